@@ -0,0 +1,88 @@
+import argparse
+import io
+import time
+import numpy as np
+import pandas as pd
+from utils import config
+from utils.helpers import convert_decimal_comma_to_dot, convert_decimal_comma_series
+
+
+def build_sample_csv(rows: int, seed: int = 42) -> str:
+    rng = np.random.default_rng(seed)
+    
+    def decimal_comma(values):
+        text = pd.Series(np.round(values, 6)).astype(str).str.replace('.', ',', regex=False)
+        return text.mask(rng.random(rows) < 0.02, '')
+    
+    sample = pd.DataFrame({
+        'km': decimal_comma(rng.uniform(0, 900, rows)),
+        'latitude': decimal_comma(rng.uniform(-35, 5, rows)),
+        'longitude': decimal_comma(rng.uniform(-75, -30, rows))
+    })
+    
+    return sample.to_csv(sep=config.CSV_SEPARATOR, index=False)
+
+
+def read_sample(csv_text: str, **kwargs) -> pd.DataFrame:
+    return pd.read_csv(io.StringIO(csv_text), sep=config.CSV_SEPARATOR, **kwargs)
+
+
+def best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run_benchmark(rows: int, repeat: int):
+    csv_text = build_sample_csv(rows)
+    columns = ['km', 'latitude', 'longitude']
+    
+    text_df = read_sample(csv_text, dtype=str)
+    
+    def per_cell():
+        return {col: text_df[col].apply(convert_decimal_comma_to_dot) for col in columns}
+    
+    def vectorized():
+        return {col: convert_decimal_comma_series(text_df[col]) for col in columns}
+    
+    def read_time():
+        parsed = read_sample(csv_text, decimal=config.DECIMAL_SEPARATOR)
+        return {col: convert_decimal_comma_series(parsed[col]) for col in columns}
+    
+    def read_text():
+        return read_sample(csv_text, dtype=str)
+    
+    expected = per_cell()
+    for results in [vectorized(), read_time()]:
+        for col in columns:
+            pd.testing.assert_series_equal(results[col], expected[col].astype(float), check_names=False)
+    
+    mixed = pd.Series(['12,5', 3, 4.25, np.nan, None, '', 'NA', ' 1,5 ', '1e3', True], dtype=object)
+    pd.testing.assert_series_equal(convert_decimal_comma_series(mixed),
+                                   mixed.apply(convert_decimal_comma_to_dot).astype(float))
+    
+    per_cell_time = best_of(per_cell, repeat)
+    vectorized_time = best_of(vectorized, repeat)
+    read_text_time = best_of(read_text, repeat)
+    read_time_time = best_of(read_time, repeat)
+    
+    print(f"Decimal-comma parsing of km/latitude/longitude ({rows:,} rows, best of {repeat})")
+    print(f"   per-cell apply (after str read):    {per_cell_time * 1000:10.1f} ms")
+    print(f"   bulk string ops (after str read):   {vectorized_time * 1000:10.1f} ms   "
+          f"({per_cell_time / vectorized_time:.1f}x)")
+    print(f"   read as str + per-cell apply:       {(read_text_time + per_cell_time) * 1000:10.1f} ms")
+    print(f"   read with decimal=',' (parse+read): {read_time_time * 1000:10.1f} ms   "
+          f"({(read_text_time + per_cell_time) / read_time_time:.1f}x)")
+    print("   ✓ Results identical to convert_decimal_comma_to_dot")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark decimal-comma parsing in the clean phase")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    
+    run_benchmark(args.rows, args.repeat)
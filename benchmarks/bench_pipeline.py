@@ -0,0 +1,172 @@
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+from utils import config
+from utils.helpers import get_peak_rss_mb
+from benchmarks.generate_datatran import write_datatran
+
+DEFAULT_SIZES = [50_000, 1_000_000, 10_000_000]
+BENCH_DIR = config.BASE_DIR / "benchmarks"
+RESULTS_FILE = BENCH_DIR / "results" / "pipeline_results.jsonl"
+
+
+def use_data_dir(base: Path):
+    config.DATA_DIR = base
+    config.RAW_DIR = base / "raw"
+    config.STAGING_DIR = base / "staging"
+    config.FINAL_DIR = base / "final"
+    config.RAW_FILE = config.RAW_DIR / "raw.csv"
+    config.CLEANED_FILE = config.STAGING_DIR / config.CLEANED_FILE.name
+    config.ENRICHED_FILE = config.STAGING_DIR / config.ENRICHED_FILE.name
+    config.CHECKPOINT_DIR = config.STAGING_DIR / "checkpoints"
+    config.INCREMENTAL_DIR = config.STAGING_DIR / "incremental"
+    config.CUBE_DIR = config.FINAL_DIR / "cube"
+    config.OUTPUT_FILES = {key: config.FINAL_DIR / path.name for key, path in config.OUTPUT_FILES.items()}
+
+
+def get_git_revision() -> str:
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=config.BASE_DIR,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=config.BASE_DIR,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return f"{revision}-dirty" if dirty else revision
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def prepare_raw_file(rows: int, seed: int, workdir: Path) -> Path:
+    raw_file = workdir / "raw" / f"datatran_synthetic_{rows}_{seed}.csv"
+    if not raw_file.exists():
+        start = time.perf_counter()
+        write_datatran(rows, raw_file, seed)
+        print(f"   Generated {raw_file.name} in {time.perf_counter() - start:.1f}s")
+    return raw_file
+
+
+def run_once(rows: int, seed: int, workdir: Path, streaming: bool):
+    from pipeline import run_pipeline
+    
+    base = workdir / f"run_{rows}"
+    use_data_dir(base)
+    config.CHECKPOINT_ENABLED = False
+    
+    raw_file = prepare_raw_file(rows, seed, workdir)
+    
+    start = time.perf_counter()
+    exit_code = run_pipeline(streaming=streaming, raw_source=raw_file)
+    total_s = time.perf_counter() - start
+    
+    stages = {}
+    summary_file = config.FINAL_DIR / "trace_summary.csv"
+    if exit_code == 0 and summary_file.exists():
+        summary = pd.read_csv(summary_file)
+        stages = summary[summary['category'] == 'stage'].set_index('span')['wall_s'].round(3).to_dict()
+    
+    result = {'exit_code': exit_code, 'total_s': round(total_s, 3), 'peak_rss_mb': round(get_peak_rss_mb(), 1),
+              'stages': stages}
+    print("BENCH_RESULT " + json.dumps(result))
+
+
+def run_size(rows: int, seed: int, workdir: Path, streaming: bool, timeout: int) -> dict:
+    command = [sys.executable, '-m', 'benchmarks.bench_pipeline', '--run-once', str(rows),
+               '--seed', str(seed), '--workdir', str(workdir)]
+    if streaming:
+        command.append('--stream')
+    
+    try:
+        completed = subprocess.run(command, cwd=config.BASE_DIR, capture_output=True, text=True, timeout=timeout)
+        lines = [line for line in completed.stdout.splitlines() if line.startswith('BENCH_RESULT ')]
+        if lines:
+            return json.loads(lines[-1][len('BENCH_RESULT '):])
+        return {'exit_code': completed.returncode, 'error': completed.stderr.strip().splitlines()[-1:]}
+    except subprocess.TimeoutExpired:
+        return {'exit_code': None, 'error': f"timeout after {timeout}s"}
+
+
+def record_result(result: dict, results_file: Path):
+    results_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(results_file, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+
+def load_results(results_file: Path) -> pd.DataFrame:
+    if not results_file.exists():
+        return pd.DataFrame()
+    
+    with open(results_file, encoding='utf-8') as f:
+        results = [json.loads(line) for line in f if line.strip()]
+    
+    return pd.json_normalize(results)
+
+
+def print_comparison(results_file: Path, last: int):
+    results = load_results(results_file)
+    if results.empty:
+        print(f"No benchmark results in {results_file}")
+        return
+    
+    stage_columns = [col for col in results.columns if col.startswith('stages.')]
+    columns = ['revision', 'mode', 'rows', 'total_s', 'peak_rss_mb'] + stage_columns
+    
+    for rows, runs in results.groupby('rows'):
+        table = runs[[col for col in columns if col in runs.columns]].tail(last)
+        table.columns = [col.replace('stages.', '') for col in table.columns]
+        print(f"\n{rows:,} rows")
+        print(table.to_string(index=False))
+
+
+def run_benchmarks(sizes: list, seed: int, workdir: Path, streaming: bool, timeout: int, results_file: Path):
+    revision = get_git_revision()
+    
+    for rows in sizes:
+        print(f"\nBenchmarking run_pipeline with {rows:,} rows (revision {revision})...")
+        result = run_size(rows, seed, workdir, streaming, timeout)
+        
+        result = {
+            'revision': revision,
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+            'mode': 'streaming' if streaming else 'batch',
+            'rows': rows,
+            'seed': seed,
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'machine': platform.machine(),
+            **result
+        }
+        record_result(result, results_file)
+        
+        if result.get('exit_code') == 0:
+            print(f"   ✓ {result['total_s']:.1f}s total, peak RSS {result['peak_rss_mb']:,.0f} MB")
+            for stage, wall_s in result['stages'].items():
+                print(f"      {stage:<12} {wall_s:>9.2f}s")
+        else:
+            print(f"   ✗ Failed: {result.get('error')}")
+    
+    print_comparison(results_file, last=5)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark run_pipeline end to end on synthetic datatran data")
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--stream', action='store_true', help="benchmark streaming mode")
+    parser.add_argument('--workdir', type=Path, default=BENCH_DIR / "data")
+    parser.add_argument('--results', type=Path, default=RESULTS_FILE)
+    parser.add_argument('--timeout', type=int, default=6 * 3600, help="seconds per size")
+    parser.add_argument('--compare', action='store_true', help="only print stored results")
+    parser.add_argument('--run-once', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.run_once:
+        run_once(args.run_once, args.seed, args.workdir, args.stream)
+    elif args.compare:
+        print_comparison(args.results, last=20)
+    else:
+        run_benchmarks(args.rows, args.seed, args.workdir, args.stream, args.timeout, args.results)
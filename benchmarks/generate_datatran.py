@@ -0,0 +1,247 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from utils import config
+
+DATATRAN_COLUMNS = [
+    'id', 'data_inversa', 'dia_semana', 'horario', 'uf', 'br', 'km', 'municipio',
+    'causa_acidente', 'tipo_acidente', 'classificacao_acidente', 'fase_dia', 'sentido_via',
+    'condicao_metereologica', 'tipo_pista', 'tracado_via', 'uso_solo', 'pessoas', 'mortos',
+    'feridos_leves', 'feridos_graves', 'ilesos', 'ignorados', 'feridos', 'veiculos',
+    'latitude', 'longitude', 'regional', 'delegacia', 'uop'
+]
+
+STATE_CENTERS = {
+    'AC': (-9.0, -70.5), 'AL': (-9.6, -36.6), 'AM': (-3.4, -62.2), 'AP': (1.4, -51.8),
+    'BA': (-12.6, -41.7), 'CE': (-5.2, -39.5), 'DF': (-15.8, -47.9), 'ES': (-19.6, -40.7),
+    'GO': (-16.0, -49.6), 'MA': (-5.4, -45.3), 'MG': (-18.5, -44.6), 'MS': (-20.5, -54.6),
+    'MT': (-12.9, -56.0), 'PA': (-4.0, -52.5), 'PB': (-7.2, -36.8), 'PE': (-8.4, -37.9),
+    'PI': (-7.4, -42.7), 'PR': (-24.6, -51.6), 'RJ': (-22.3, -42.7), 'RN': (-5.8, -36.5),
+    'RO': (-10.9, -62.8), 'RR': (2.1, -61.4), 'RS': (-29.7, -53.3), 'SC': (-27.3, -50.5),
+    'SE': (-10.6, -37.4), 'SP': (-22.2, -48.7), 'TO': (-10.2, -48.3)
+}
+
+STATE_WEIGHTS = {
+    'MG': 12, 'PR': 10, 'SC': 9, 'RS': 6, 'SP': 6, 'RJ': 6, 'GO': 5, 'BA': 5, 'PE': 3, 'ES': 3,
+    'MT': 3, 'MS': 3, 'RO': 2, 'CE': 2, 'PB': 2, 'RN': 2, 'PI': 2, 'MA': 2, 'DF': 2, 'TO': 1,
+    'PA': 1, 'AL': 1, 'SE': 1, 'AC': 0.5, 'AM': 0.3, 'AP': 0.3, 'RR': 0.3
+}
+
+CAUSES = [
+    'Ausência de reação do condutor', 'Reação tardia ou ineficiente do condutor',
+    'Acessar a via sem observar a presença dos outros veículos', 'Velocidade Incompatível',
+    'Ingestão de álcool pelo condutor', 'Condutor deixou de manter distância do veículo da frente',
+    'Manobra de mudança de faixa', 'Transitar na contramão', 'Ultrapassagem Indevida',
+    'Condutor Dormindo', 'Pista Escorregadia', 'Demais falhas mecânicas ou elétricas',
+    'Chuva', 'Curva acentuada', 'Desrespeitar a preferência no cruzamento',
+    'Pedestre andava na pista', 'Animais na Pista', 'Mal súbito do condutor',
+    'Defeito na via', 'Acumulo de água sobre o pavimento', 'Problema com o freio',
+    'Avarias e/ou desgaste excessivo no pneu', 'Conversão proibida', 'Carga excessiva e/ou mal acondicionada',
+    'Entrada inopinada do pedestre', 'Condutor usando celular', 'Sinalização mal posicionada',
+    'Iluminação deficiente', 'Obras na pista', 'Neblina', 'Objeto estático sobre o leito carroçável',
+    'Estacionar ou parar em local proibido', 'Ingestão de substâncias psicoativas pelo condutor',
+    'Deficiência do Sistema de Iluminação/Sinalização', 'Ausência de sinalização',
+    'Pista esburacada', 'Acostamento em desnível', 'Frear bruscamente', 'Trafegar com motocicleta (ou similar) entre as faixas',
+    'Pedestre cruzava a pista fora da faixa', 'Restrição de visibilidade em curvas horizontais',
+    'Declive acentuado', 'Fumaça', 'Afundamento ou ondulação no pavimento', 'Faixas de trânsito com largura insuficiente'
+]
+
+ACCIDENT_TYPES = [
+    'Colisão traseira', 'Saída de leito carroçável', 'Colisão transversal', 'Tombamento',
+    'Colisão lateral mesmo sentido', 'Colisão frontal', 'Queda de ocupante de veículo',
+    'Atropelamento de Pedestre', 'Colisão com objeto', 'Capotamento', 'Engavetamento',
+    'Colisão lateral sentido oposto', 'Atropelamento de Animal', 'Incêndio', 'Derramamento de carga',
+    'Eventos atípicos'
+]
+
+WEATHER = ['Céu Claro', 'Nublado', 'Chuva', 'Sol', 'Garoa/Chuvisco', 'Nevoeiro/Neblina', 'Ignorado', 'Vento', 'Granizo']
+WEATHER_WEIGHTS = [48, 17, 12, 14, 5, 2, 1.5, 0.4, 0.1]
+ROAD_TYPES = ['Simples', 'Dupla', 'Múltipla']
+ROAD_LAYOUTS = ['Reta', 'Curva', 'Interseção de vias', 'Aclive', 'Declive', 'Retorno Regulamentado',
+                'Rotatória', 'Desvio Temporário', 'Viaduto', 'Ponte', 'Túnel', 'Não Informado']
+WEEKDAYS_PT = ['segunda-feira', 'terça-feira', 'quarta-feira', 'quinta-feira', 'sexta-feira', 'sábado', 'domingo']
+
+HIGHWAYS = 120
+CITIES = 1900
+HIGHWAY_LENGTH_KM = (150, 2500)
+HOTSPOTS_PER_HIGHWAY = 40
+KM_PER_DEGREE = 111.0
+
+
+def zipf_weights(count: int, exponent: float = 1.1) -> np.ndarray:
+    weights = 1 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+
+def build_road_network(seed: int) -> dict:
+    rng = np.random.default_rng([seed, 0])
+    
+    states = list(STATE_CENTERS)
+    state_weights = np.array([STATE_WEIGHTS[uf] for uf in states], dtype=float)
+    state_weights /= state_weights.sum()
+    
+    numbers = np.sort(rng.choice(np.arange(10, 500), size=HIGHWAYS, replace=False))
+    lengths = rng.uniform(*HIGHWAY_LENGTH_KM, size=HIGHWAYS)
+    
+    routes = []
+    for length in lengths:
+        stops = rng.choice(len(states), size=rng.integers(1, 5), replace=False, p=state_weights)
+        waypoints = np.array([STATE_CENTERS[states[stop]] for stop in stops])
+        waypoints = waypoints + rng.normal(0, 1.0, size=waypoints.shape)
+        if len(waypoints) == 1:
+            waypoints = np.vstack([waypoints, waypoints + rng.normal(0, length / KM_PER_DEGREE / 2, size=(1, 2))])
+        routes.append({'waypoints': waypoints, 'states': [states[stop] for stop in stops]})
+    
+    return {
+        'numbers': numbers,
+        'lengths': lengths,
+        'routes': routes,
+        'highway_weights': zipf_weights(HIGHWAYS, 0.9),
+        'hotspots': rng.uniform(0, 1, size=(HIGHWAYS, HOTSPOTS_PER_HIGHWAY)),
+        'hotspot_weights': zipf_weights(HOTSPOTS_PER_HIGHWAY, 1.2),
+        'cities': [f"CIDADE {index:04d}" for index in range(CITIES)]
+    }
+
+
+def position_on_route(route: dict, fraction: np.ndarray) -> tuple:
+    waypoints = route['waypoints']
+    legs = len(waypoints) - 1
+    leg = np.minimum((fraction * legs).astype(int), legs - 1)
+    within = fraction * legs - leg
+    
+    start, end = waypoints[leg], waypoints[leg + 1]
+    points = start + (end - start) * within[:, None]
+    states = np.array(route['states'] + route['states'][-1:])[np.where(within < 0.5, leg, leg + 1)]
+    
+    return points[:, 0], points[:, 1], states
+
+
+def decimal_comma(values: np.ndarray, decimals: int) -> pd.Series:
+    text = pd.Series(np.round(values, decimals)).astype(str).str.replace('.', ',', regex=False)
+    return text.mask(pd.isna(values), '')
+
+
+def generate_chunk(rows: int, network: dict, seed: int, chunk_number: int, first_id: int) -> pd.DataFrame:
+    rng = np.random.default_rng([seed, chunk_number + 1])
+    
+    highway = rng.choice(HIGHWAYS, size=rows, p=network['highway_weights'])
+    hotspot = rng.choice(HOTSPOTS_PER_HIGHWAY, size=rows, p=network['hotspot_weights'])
+    near_hotspot = rng.random(rows) < 0.6
+    
+    fraction = np.where(
+        near_hotspot,
+        network['hotspots'][highway, hotspot] + rng.normal(0, 0.002, rows),
+        rng.random(rows)
+    ).clip(0, 1)
+    km = fraction * network['lengths'][highway]
+    
+    latitude = np.empty(rows)
+    longitude = np.empty(rows)
+    uf = np.empty(rows, dtype=object)
+    for number in np.unique(highway):
+        mask = highway == number
+        latitude[mask], longitude[mask], uf[mask] = position_on_route(network['routes'][number], fraction[mask])
+    
+    latitude = (latitude + rng.normal(0, 0.003, rows)).clip(-33.7, 5.2)
+    longitude = (longitude + rng.normal(0, 0.003, rows)).clip(-73.9, -34.8)
+    missing_coords = rng.random(rows) < 0.005
+    latitude[missing_coords] = np.nan
+    longitude[missing_coords] = np.nan
+    
+    uf = pd.Series(uf)
+    city = (highway * 7919 + (km // 30).astype(int) * 104729) % CITIES
+    
+    day = rng.integers(0, 365, rows)
+    dates = pd.Timestamp('2024-01-01') + pd.to_timedelta(day, unit='D')
+    hour = (rng.normal(14, 5.5, rows) % 24).astype(int)
+    minute = rng.integers(0, 60, rows)
+    second = np.where(rng.random(rows) < 0.9, 0, rng.integers(0, 60, rows))
+    
+    people = rng.poisson(2.3, rows) + 1
+    deaths = rng.binomial(people, 0.02)
+    serious = rng.binomial(people - deaths, 0.08)
+    light = rng.binomial(people - deaths - serious, 0.3)
+    ignored = rng.binomial(people - deaths - serious - light, 0.02)
+    unharmed = people - deaths - serious - light - ignored
+    injured = serious + light
+    
+    classification = np.where(deaths > 0, 'Com Vítimas Fatais',
+                              np.where(injured > 0, 'Com Vítimas Feridas', 'Sem Vítimas'))
+    
+    night = (hour < 6) | (hour >= 19)
+    phase = np.where(night, 'Plena Noite', 'Pleno dia')
+    phase = np.where(hour == 18, 'Anoitecer', np.where(hour == 6, 'Amanhecer', phase))
+    
+    return pd.DataFrame({
+        'id': np.arange(first_id, first_id + rows),
+        'data_inversa': dates.strftime(config.DATE_FORMAT),
+        'dia_semana': np.array(WEEKDAYS_PT)[dates.dayofweek],
+        'horario': [f"{h:02d}:{m:02d}:{s:02d}" for h, m, s in zip(hour, minute, second)],
+        'uf': uf.values,
+        'br': network['numbers'][highway],
+        'km': decimal_comma(km, 1).values,
+        'municipio': np.array(network['cities'])[city],
+        'causa_acidente': rng.choice(CAUSES, size=rows, p=zipf_weights(len(CAUSES), 1.0)),
+        'tipo_acidente': rng.choice(ACCIDENT_TYPES, size=rows, p=zipf_weights(len(ACCIDENT_TYPES), 0.9)),
+        'classificacao_acidente': classification,
+        'fase_dia': phase,
+        'sentido_via': np.where(rng.random(rows) < 0.5, 'Crescente', 'Decrescente'),
+        'condicao_metereologica': rng.choice(WEATHER, size=rows, p=np.array(WEATHER_WEIGHTS) / sum(WEATHER_WEIGHTS)),
+        'tipo_pista': rng.choice(ROAD_TYPES, size=rows, p=[0.5, 0.4, 0.1]),
+        'tracado_via': rng.choice(ROAD_LAYOUTS, size=rows, p=zipf_weights(len(ROAD_LAYOUTS), 1.4)),
+        'uso_solo': np.where(rng.random(rows) < 0.45, 'Sim', 'Não'),
+        'pessoas': people,
+        'mortos': deaths,
+        'feridos_leves': light,
+        'feridos_graves': serious,
+        'ilesos': unharmed,
+        'ignorados': ignored,
+        'feridos': injured,
+        'veiculos': rng.poisson(0.8, rows) + 1,
+        'latitude': decimal_comma(latitude, 7).values,
+        'longitude': decimal_comma(longitude, 7).values,
+        'regional': ('SPRF-' + uf).values,
+        'delegacia': ('DEL' + pd.Series(city % 12 + 1).astype(str).str.zfill(2) + '-' + uf).values,
+        'uop': ('UOP' + pd.Series(city % 30 + 1).astype(str).str.zfill(2) + '-' + uf).values
+    }, columns=DATATRAN_COLUMNS)
+
+
+def generate_datatran(rows: int, seed: int = 42, chunk_rows: int = 1_000_000):
+    network = build_road_network(seed)
+    
+    for chunk_number, first_row in enumerate(range(0, rows, chunk_rows)):
+        chunk_size = min(chunk_rows, rows - first_row)
+        yield generate_chunk(chunk_size, network, seed, chunk_number, 400_000 + first_row)
+
+
+def write_datatran(rows: int, filepath, seed: int = 42, chunk_rows: int = 1_000_000) -> Path:
+    filepath = Path(filepath)
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    
+    for chunk_number, chunk in enumerate(generate_datatran(rows, seed, chunk_rows)):
+        chunk.to_csv(
+            filepath,
+            sep=config.CSV_SEPARATOR,
+            encoding=config.ENCODING,
+            index=False,
+            mode='w' if chunk_number == 0 else 'a',
+            header=chunk_number == 0
+        )
+    
+    return filepath
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic PRF datatran CSV")
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help="default: data/raw/datatran_synthetic_<rows>.csv")
+    args = parser.parse_args()
+    
+    output = args.output or config.RAW_DIR / f"datatran_synthetic_{args.rows}.csv"
+    
+    start = time.perf_counter()
+    write_datatran(args.rows, output, args.seed)
+    print(f"✓ Wrote {args.rows:,} synthetic records to {output} in {time.perf_counter() - start:.1f}s")
@@ -1,38 +1,36 @@
 import pandas as pd
+import glob
 import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from utils import config
-from utils.helpers import load_dataframe, create_directory_structure
+from utils.helpers import load_dataframe, create_directory_structure, parse_datetime_series
 
 logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
 logger = logging.getLogger(__name__)
 
 
-def extract_data() -> pd.DataFrame:
+def extract_data(source=None) -> pd.DataFrame:
     logger.info("="*80)
     logger.info("EXTRACT PHASE - Loading raw data")
     logger.info("="*80)
     
     create_directory_structure()
     
-    if not config.RAW_FILE.exists():
-        raise FileNotFoundError(f"Raw data file not found: {config.RAW_FILE}")
+    raw_files = resolve_raw_files(source)
     
-    logger.info(f"Reading file: {config.RAW_FILE}")
     logger.info(f"Encoding: {config.ENCODING}, Separator: '{config.CSV_SEPARATOR}'")
     
     try:
-        df = pd.read_csv(
-            config.RAW_FILE,
-            sep=config.CSV_SEPARATOR,
-            encoding=config.ENCODING,
-            low_memory=False
-        )
+        if len(raw_files) == 1:
+            df = read_raw_file(raw_files[0])
+        else:
+            df = read_raw_files_parallel(raw_files)
         
         logger.info(f"✓ Successfully loaded {len(df):,} records")
         logger.info(f"✓ Found {len(df.columns)} columns")
         
-        validate_raw_data(df)
         print_extraction_summary(df)
         
         return df
@@ -42,6 +40,90 @@ def extract_data() -> pd.DataFrame:
         raise
 
 
+def resolve_raw_files(source=None) -> list:
+    source = source or config.RAW_FILE
+    
+    if glob.has_magic(str(source)):
+        raw_files = sorted(Path(path) for path in glob.glob(str(source)))
+    elif Path(source).is_dir():
+        raw_files = sorted(Path(source).glob(config.RAW_FILE_PATTERN))
+    else:
+        raw_files = [Path(source)] if Path(source).exists() else []
+    
+    if not raw_files:
+        raise FileNotFoundError(f"Raw data file not found: {source}")
+    
+    logger.info(f"Found {len(raw_files)} raw file(s) in {source}")
+    
+    return raw_files
+
+
+def read_raw_file(filepath: Path) -> pd.DataFrame:
+    logger.info(f"Reading file: {filepath}")
+    
+    df = pd.read_csv(
+        filepath,
+        sep=config.CSV_SEPARATOR,
+        encoding=config.ENCODING,
+        dtype=config.RAW_DTYPES,
+        decimal=config.DECIMAL_SEPARATOR,
+        low_memory=False
+    )
+    
+    logger.info(f"✓ {filepath.name}: {len(df):,} records")
+    validate_raw_data(df)
+    
+    return df
+
+
+def read_raw_files_parallel(raw_files: list) -> pd.DataFrame:
+    max_workers = min(config.EXTRACT_WORKERS or os.cpu_count() or 1, len(raw_files))
+    logger.info(f"Parsing {len(raw_files)} files with {max_workers} worker processes...")
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        frames = list(executor.map(read_raw_file, raw_files))
+    
+    df = pd.concat(frames, ignore_index=True)
+    
+    duplicate_ids = df['id'].duplicated().sum() if 'id' in df.columns else 0
+    if duplicate_ids > 0:
+        logger.warning(f"Found {duplicate_ids} duplicate IDs across files")
+    
+    return df
+
+
+def iter_raw_chunks(chunksize: int = None, source=None):
+    chunksize = chunksize or config.STREAM_CHUNK_SIZE
+    
+    create_directory_structure()
+    
+    raw_files = resolve_raw_files(source)
+    
+    logger.info(f"Encoding: {config.ENCODING}, Separator: '{config.CSV_SEPARATOR}'")
+    
+    total_rows = 0
+    chunk_number = 0
+    for filepath in raw_files:
+        logger.info(f"Streaming file: {filepath} ({chunksize:,} rows per chunk)")
+        
+        reader = pd.read_csv(
+            filepath,
+            sep=config.CSV_SEPARATOR,
+            encoding=config.ENCODING,
+            dtype=config.RAW_DTYPES,
+            decimal=config.DECIMAL_SEPARATOR,
+            chunksize=chunksize,
+            low_memory=False
+        )
+        
+        with reader:
+            for chunk in reader:
+                chunk_number += 1
+                total_rows += len(chunk)
+                logger.info(f"✓ Read chunk {chunk_number}: {len(chunk):,} records ({total_rows:,} total)")
+                yield chunk
+
+
 def validate_raw_data(df: pd.DataFrame):
     logger.info("\nValidating raw data...")
     
@@ -71,11 +153,10 @@ def validate_raw_data(df: pd.DataFrame):
     
     if 'data_inversa' in df.columns:
         try:
-            df['_temp_date'] = pd.to_datetime(df['data_inversa'], format='%Y-%m-%d', errors='coerce')
-            min_date = df['_temp_date'].min()
-            max_date = df['_temp_date'].max()
+            _, dates = parse_datetime_series(df['data_inversa'], config.DATE_FORMAT)
+            min_date = dates.min()
+            max_date = dates.max()
             logger.info(f"✓ Date range: {min_date.date()} to {max_date.date()}")
-            df.drop('_temp_date', axis=1, inplace=True)
         except:
             logger.warning("Could not determine date range")
     
@@ -4,7 +4,7 @@ import logging
 from datetime import datetime
 from pathlib import Path
 from utils import config
-from utils.helpers import save_dataframe
+from utils.helpers import save_dataframe, add_popup_fields
 
 logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
 logger = logging.getLogger(__name__)
@@ -18,6 +18,8 @@ def export_data(df: pd.DataFrame, aggregated: dict):
     config.FINAL_DIR.mkdir(parents=True, exist_ok=True)
     
     logger.info("\n1. Exporting main detailed file...")
+    if config.EXPORT_POPUP_FIELDS:
+        df = add_popup_fields(df.copy(deep=False))
     save_dataframe(df, config.OUTPUT_FILES['detailed'], "accidents_detailed")
     
     logger.info("\n2. Exporting risk by time...")
@@ -47,6 +49,8 @@ def export_data(df: pd.DataFrame, aggregated: dict):
     logger.info("\n8. Exporting heatmap clusters...")
     if 'heatmap' in aggregated and not aggregated['heatmap'].empty:
         save_dataframe(aggregated['heatmap'], config.OUTPUT_FILES['heatmap_clusters'], "accident_heatmap_clusters")
+    if 'heatmap_sweep' in aggregated:
+        export_heatmap_sweep(aggregated['heatmap_sweep'])
     
     logger.info("\n9. Exporting daily calendar...")
     if 'daily' in aggregated and not aggregated['daily'].empty:
@@ -56,7 +60,18 @@ def export_data(df: pd.DataFrame, aggregated: dict):
     if 'answers' in aggregated and not aggregated['answers'].empty:
         save_dataframe(aggregated['answers'], config.OUTPUT_FILES['worst_answers'], "worst_answers")
     
-    logger.info("\n11. Creating metadata file...")
+    logger.info("\n11. Exporting aggregate cube...")
+    if 'cube' in aggregated:
+        export_cube(aggregated['cube'])
+    
+    if 'detailed_changes' in aggregated:
+        logger.info("\n12. Exporting changed accidents (incremental)...")
+        detailed_changes = aggregated['detailed_changes']
+        if config.EXPORT_POPUP_FIELDS:
+            detailed_changes = add_popup_fields(detailed_changes.copy(deep=False))
+        save_dataframe(detailed_changes, config.OUTPUT_FILES['detailed_changes'], "accidents_detailed_changes")
+    
+    logger.info("\n13. Creating metadata file...")
     create_metadata(df, aggregated)
     
     print_export_summary(df, aggregated)
@@ -66,6 +81,19 @@ def export_data(df: pd.DataFrame, aggregated: dict):
     logger.info("="*80)
 
 
+def export_heatmap_sweep(sweep: pd.DataFrame):
+    heatmap_file = config.OUTPUT_FILES['heatmap_clusters']
+    for (eps_km, min_samples), variant in sweep.groupby(['eps_km', 'min_samples'], sort=False):
+        name = f"{heatmap_file.stem}_eps{eps_km:g}km_min{min_samples}"
+        save_dataframe(variant.drop(columns=['eps_km', 'min_samples']), heatmap_file.with_name(name + heatmap_file.suffix), name)
+
+
+def export_cube(cube: dict):
+    config.CUBE_DIR.mkdir(parents=True, exist_ok=True)
+    for name, cuboid in cube.items():
+        save_dataframe(cuboid, config.CUBE_DIR / f"{name}.parquet", f"cube {name}")
+
+
 def create_metadata(df: pd.DataFrame, aggregated: dict):
     metadata = {
         'pipeline_version': '1.0',
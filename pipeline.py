@@ -1,18 +1,28 @@
 #!/usr/bin/env python3
 
+import argparse
 import logging
 import time
 from datetime import datetime
 from pathlib import Path
 
-from extract.extract_data import extract_data
+import pandas as pd
+
+from extract.extract_data import extract_data, resolve_raw_files
 from transform.clean_data import clean_data
 from transform.enrich_data import enrich_data
+from transform.stream_data import stream_data
+from transform.incremental import run_incremental, find_moved_rows
 from transform.calculate_risks import calculate_risks
 from transform.geographic_analysis import analyze_geography
 from transform.aggregate_data import aggregate_data
 from load.export_data import export_data
 from utils import config
+from utils.helpers import log_memory_usage, get_frame_memory_mb
+from utils.group_stats import create_group_store
+from utils.checkpoint import (build_stage_keys, fingerprint_files, find_resume_stage,
+                              save_checkpoint, load_checkpoint, CheckpointNotFoundError)
+from utils.tracing import reset_trace, start_span, end_span, write_trace
 
 logging.basicConfig(
     level=config.LOG_LEVEL,
@@ -49,43 +59,185 @@ def print_footer(start_time: float):
     print("="*80 + "\n")
 
 
-def run_pipeline():
+STAGES = [
+    {'name': 'extract', 'label': 'EXTRACT', 'cacheable': True,
+     'config_keys': ['ENCODING', 'CSV_SEPARATOR', 'DECIMAL_SEPARATOR', 'RAW_DTYPES'],
+     'source_files': ['extract/extract_data.py']},
+    {'name': 'clean', 'label': 'CLEAN', 'cacheable': True,
+     'config_keys': ['DATE_FORMAT', 'TIME_FORMAT', 'DTYPE_PLAN'],
+     'source_files': ['transform/clean_data.py', 'utils/helpers.py']},
+    {'name': 'enrich', 'label': 'ENRICH', 'cacheable': True,
+     'config_keys': ['BRAZILIAN_REGIONS', 'SEVERITY_COLORS', 'TIME_PERIODS', 'RUSH_HOURS',
+                     'HUMAN_CAUSES', 'MECHANICAL_CAUSES', 'ENVIRONMENTAL_CAUSES',
+                     'SEVERITY_WEIGHTS', 'SEVERITY_SCALE', 'SEVERITY_MAX_SCORE',
+                     'CHARACTERISTIC_FLAGS', 'RISK_FLAGS', 'DTYPE_PLAN'],
+     'source_files': ['transform/enrich_data.py', 'utils/helpers.py']},
+    {'name': 'risks', 'label': 'CALCULATE RISKS', 'cacheable': True,
+     'config_keys': ['HIGH_RISK_PERCENTILE', 'DTYPE_PLAN'],
+     'source_files': ['transform/calculate_risks.py', 'utils/helpers.py', 'utils/group_stats.py',
+                      'utils/dense_groupby.py']},
+    {'name': 'geography', 'label': 'GEOGRAPHIC ANALYSIS', 'cacheable': True,
+     'config_keys': ['CLUSTER_EPSILON_KM', 'CLUSTER_MIN_SAMPLES', 'CLUSTER_ENGINE',
+                     'CLUSTER_COLLAPSE_DUPLICATES', 'CLUSTER_COORDINATE_DECIMALS', 'CLUSTER_SWEEP',
+                     'SEGMENT_LENGTH_KM', 'DTYPE_PLAN'],
+     'source_files': ['transform/geographic_analysis.py', 'transform/clustering.py', 'utils/helpers.py']},
+    {'name': 'aggregate', 'label': 'AGGREGATE', 'cacheable': True, 'resume_checkpoints': [5, 6],
+     'config_keys': ['HOTSPOT_MIN_ACCIDENTS', 'CUBE_CUBOIDS'],
+     'source_files': ['transform/aggregate_data.py', 'transform/cube.py', 'utils/helpers.py',
+                      'utils/dense_groupby.py']},
+    {'name': 'export', 'label': 'LOAD & EXPORT', 'cacheable': False,
+     'config_keys': ['OUTPUT_FILES', 'OUTPUT_ENCODING', 'OUTPUT_SEPARATOR', 'EXPORT_POPUP_FIELDS'],
+     'source_files': ['load/export_data.py']},
+]
+
+
+def resolve_start_stage(from_stage, resume: bool, stage_keys: dict) -> int:
+    if from_stage is not None:
+        names = [stage['name'] for stage in STAGES]
+        start_stage = names.index(from_stage) + 1 if from_stage in names else int(from_stage)
+        if not 1 <= start_stage <= len(STAGES):
+            raise ValueError(f"Invalid stage: {from_stage} (use 1-{len(STAGES)} or one of {names})")
+        return start_stage
+    
+    if resume:
+        return find_resume_stage(STAGES, stage_keys)
+    
+    return 1
+
+
+def measure_frame(df) -> float:
+    if df is None or not (config.MEMORY_REPORT or config.TRACE_ENABLED):
+        return None
+    return get_frame_memory_mb(df)
+
+
+def log_stage(number: int, df=None):
+    logger.info(f"Stage {number}/{len(STAGES)}: {STAGES[number - 1]['label']}")
+    memory_mb = measure_frame(df)
+    if df is not None:
+        log_memory_usage(df, f"before {STAGES[number - 1]['name']}", memory_mb)
+    start_span(STAGES[number - 1]['name'], 'stage', df, memory_mb)
+
+
+def finish_stage(number: int, stage_keys: dict, df, result=None):
+    memory_mb = measure_frame(df)
+    log_memory_usage(df, f"after {STAGES[number - 1]['name']}", memory_mb)
+    if stage_keys is not None:
+        save_checkpoint(df if result is None else result, number, STAGES[number - 1]['name'], stage_keys[number])
+    end_span(df, memory_mb)
+
+
+def restore_stage(number: int, stage_keys: dict):
+    return load_checkpoint(number, STAGES[number - 1]['name'], stage_keys[number])
+
+
+def run_pipeline(streaming: bool = None, raw_source=None, from_stage=None, resume: bool = False,
+                 incremental: bool = False):
     start_time = time.time()
     
+    # Stages take ownership of the frame they receive and mutate it in place;
+    # copy-on-write (always on from pandas 3) keeps subsets from aliasing it.
+    if int(pd.__version__.split('.')[0]) < 3:
+        pd.set_option('mode.copy_on_write', True)
+    
+    if streaming is None:
+        streaming = config.STREAMING_MODE
+    
     try:
         print_header()
+        reset_trace()
+        
+        if incremental and (resume or from_stage is not None):
+            raise ValueError("--incremental cannot be combined with --resume or --from-stage")
+        
+        raw_files = resolve_raw_files(raw_source)
+        stage_keys = None if incremental else build_stage_keys(fingerprint_files(raw_files), STAGES)
+        start_stage = resolve_start_stage(from_stage, resume, stage_keys)
+        
+        if start_stage > 1:
+            logger.info(f"Resuming from stage {start_stage}/{len(STAGES)} using cached checkpoints")
+        
+        group_stats = None
+        row_keys = delta_keys = None
+        
+        if 2 <= start_stage <= 5:
+            df = restore_stage(start_stage - 1, stage_keys)
+        elif start_stage >= 6:
+            df, clusters, segments, sweep = restore_stage(5, stage_keys)
+        if start_stage == 7:
+            aggregated = restore_stage(6, stage_keys)
+        
+        if incremental:
+            logger.info("Stages 1-3/7: EXTRACT → CLEAN → ENRICH (incremental)")
+            start_span('incremental', 'stage')
+            df, group_stats, row_keys, delta_keys = run_incremental(raw_source)
+            end_span(df)
+            start_stage = 4
         
-        logger.info("Stage 1/7: EXTRACT")
-        df = extract_data()
+        if streaming and start_stage == 1:
+            logger.info("Stages 1-3/7: EXTRACT → CLEAN → ENRICH (streaming)")
+            start_span('streaming', 'stage')
+            df, group_stats = stream_data(source=raw_source)
+            finish_stage(3, stage_keys, df)
+            start_stage = 4
         
-        logger.info("Stage 2/7: CLEAN")
-        df = clean_data(df)
+        if start_stage <= 1:
+            log_stage(1)
+            df = extract_data(raw_source)
+            finish_stage(1, stage_keys, df)
         
-        logger.info("Stage 3/7: ENRICH")
-        df = enrich_data(df)
+        if start_stage <= 2:
+            log_stage(2, df)
+            df = clean_data(df)
+            finish_stage(2, stage_keys, df)
         
-        logger.info("Stage 4/7: CALCULATE RISKS")
-        df = calculate_risks(df)
+        if start_stage <= 3:
+            log_stage(3, df)
+            df = enrich_data(df)
+            finish_stage(3, stage_keys, df)
         
-        logger.info("Stage 5/7: GEOGRAPHIC ANALYSIS")
-        df, clusters, segments = analyze_geography(df)
+        if start_stage <= 4:
+            log_stage(4, df)
+            group_store = create_group_store(df, group_stats)
+            df = calculate_risks(df, group_store)
+            finish_stage(4, stage_keys, df)
         
-        logger.info("Stage 6/7: AGGREGATE")
-        aggregated = aggregate_data(df, clusters, segments)
+        if start_stage <= 5:
+            log_stage(5, df)
+            df, clusters, segments, sweep = analyze_geography(df)
+            finish_stage(5, stage_keys, df, (df, clusters, segments, sweep))
         
-        logger.info("Stage 7/7: LOAD & EXPORT")
+        if start_stage <= 6:
+            log_stage(6, df)
+            aggregated = aggregate_data(df, clusters, segments, sweep)
+            finish_stage(6, stage_keys, df, aggregated)
+        
+        if incremental:
+            aggregated['detailed_changes'] = find_moved_rows(df, row_keys, delta_keys)
+        
+        log_stage(7, df)
         export_data(df, aggregated)
+        end_span()
         
+        write_trace()
         print_footer(start_time)
         logger.info("✓ Pipeline completed successfully")
         
         return 0
         
+    except CheckpointNotFoundError as e:
+        logger.error(f"✗ Checkpoint not found: {e}")
+        print(f"\nERROR: {e}")
+        print("\nRerun from an earlier stage, or let --resume pick the last stage that can be restored:")
+        print(f"   python3 pipeline.py --from-stage {e.number}")
+        print("   python3 pipeline.py --resume")
+        return 1
+        
     except FileNotFoundError as e:
         logger.error(f"✗ File not found: {e}")
         print(f"\nERROR: {e}")
         print("\nMake sure the raw data file exists at:")
-        print(f"   {config.RAW_FILE}")
+        print(f"   {raw_source or config.RAW_FILE}")
         return 1
         
     except Exception as e:
@@ -96,8 +248,26 @@ def run_pipeline():
         return 1
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="PRF traffic accident data pipeline")
+    parser.add_argument('--stream', action='store_true',
+                        help="read the raw data in chunks (see STREAM_CHUNK_SIZE)")
+    parser.add_argument('--raw', dest='raw_source',
+                        help="raw CSV file, directory or glob (default: config.RAW_FILE)")
+    parser.add_argument('--from-stage', dest='from_stage',
+                        help="start at this stage (1-7 or name), loading the previous stage from its checkpoint")
+    parser.add_argument('--resume', action='store_true',
+                        help="skip every stage whose cached checkpoint is still valid")
+    parser.add_argument('--incremental', action='store_true',
+                        help="only clean and enrich records that are new or changed since the last incremental run")
+    return parser.parse_args()
+
+
 def main():
-    exit_code = run_pipeline()
+    args = parse_args()
+    exit_code = run_pipeline(streaming=args.stream or None, raw_source=args.raw_source,
+                             from_stage=args.from_stage, resume=args.resume,
+                             incremental=args.incremental)
     exit(exit_code)
 
 
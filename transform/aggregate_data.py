@@ -2,94 +2,82 @@ import pandas as pd
 import numpy as np
 import logging
 from utils import config
-from utils.helpers import save_dataframe
+from utils.helpers import save_dataframe, add_popup_fields, POPUP_FIELDS
+from transform.cube import build_cube, rollup_cube, rollup_mode, rollup_nunique, has_dimensions, cube_total
 
 logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
 logger = logging.getLogger(__name__)
 
 
-def aggregate_data(df: pd.DataFrame, clusters: pd.DataFrame, segments: pd.DataFrame) -> dict:
+def aggregate_data(df: pd.DataFrame, clusters: pd.DataFrame, segments: pd.DataFrame,
+                   sweep: pd.DataFrame = None) -> dict:
     logger.info("="*80)
     logger.info("AGGREGATION PHASE - Creating summary views")
     logger.info("="*80)
     
     aggregated = {}
     
-    logger.info("\n1. Aggregating risk by time...")
-    aggregated['risk_time'] = aggregate_risk_by_time(df)
+    logger.info("\n1. Building aggregate cube...")
+    cube = build_cube(df)
+    aggregated['cube'] = cube
     
-    logger.info("\n2. Aggregating risk by location...")
-    aggregated['risk_location'] = aggregate_risk_by_location(df)
+    logger.info("\n2. Aggregating risk by time...")
+    aggregated['risk_time'] = aggregate_risk_by_time(cube)
     
-    logger.info("\n3. Creating danger rankings...")
-    aggregated['rankings'] = create_danger_rankings(df)
+    logger.info("\n3. Aggregating risk by location...")
+    aggregated['risk_location'] = aggregate_risk_by_location(cube)
     
-    logger.info("\n4. Identifying worst scenarios...")
+    logger.info("\n4. Creating danger rankings...")
+    aggregated['rankings'] = create_danger_rankings(cube)
+    
+    logger.info("\n5. Identifying worst scenarios...")
     aggregated['scenarios'] = create_worst_scenarios(df)
     
-    logger.info("\n5. Creating daily risk calendar...")
+    logger.info("\n6. Creating daily risk calendar...")
     aggregated['daily'] = create_daily_calendar(df)
     
-    logger.info("\n6. Generating worst answers...")
-    aggregated['answers'] = generate_worst_answers(df)
+    logger.info("\n7. Generating worst answers...")
+    aggregated['answers'] = generate_worst_answers(cube)
     
-    logger.info("\n7. Preparing map visualization data...")
+    logger.info("\n8. Preparing map visualization data...")
     aggregated['map_points'] = prepare_map_points(df)
     aggregated['heatmap'] = clusters
     aggregated['segments'] = segments
+    if sweep is not None and not sweep.empty:
+        aggregated['heatmap_sweep'] = sweep
     
     logger.info("\n✓ Aggregation complete - created 9 output files")
     
     return aggregated
 
 
-def aggregate_risk_by_time(df: pd.DataFrame) -> pd.DataFrame:
+RISK_MEASURES = ['id', 'mortos', 'feridos', 'severity_score', 'composite_risk_score']
+RANKING_MEASURES = ['id', 'mortos', 'composite_risk_score']
+
+
+def aggregate_risk_by_time(cube: dict) -> pd.DataFrame:
     time_dims = []
     
-    if 'hour' in df.columns:
-        hour_agg = df.groupby('hour').agg({
-            'id': 'count',
-            'mortos': 'sum',
-            'feridos': 'sum',
-            'severity_score': 'mean',
-            'composite_risk_score': 'mean'
-        }).reset_index()
+    if has_dimensions(cube, 'hour'):
+        hour_agg = rollup_cube(cube, 'hour', RISK_MEASURES).reset_index()
         hour_agg['time_dimension'] = 'hour'
         hour_agg['time_value'] = hour_agg['hour'].astype(str) + 'h'
         time_dims.append(hour_agg.drop('hour', axis=1))
     
-    if 'day_of_week' in df.columns and 'day_of_week_name_pt' in df.columns:
-        dow_agg = df.groupby(['day_of_week', 'day_of_week_name_pt']).agg({
-            'id': 'count',
-            'mortos': 'sum',
-            'feridos': 'sum',
-            'severity_score': 'mean',
-            'composite_risk_score': 'mean'
-        }).reset_index()
+    if has_dimensions(cube, ['day_of_week', 'day_of_week_name_pt']):
+        dow_agg = rollup_cube(cube, ['day_of_week', 'day_of_week_name_pt'], RISK_MEASURES).reset_index()
         dow_agg['time_dimension'] = 'day_of_week'
         dow_agg['time_value'] = dow_agg['day_of_week_name_pt']
         time_dims.append(dow_agg.drop(['day_of_week', 'day_of_week_name_pt'], axis=1))
     
-    if 'day_of_month' in df.columns:
-        dom_agg = df.groupby('day_of_month').agg({
-            'id': 'count',
-            'mortos': 'sum',
-            'feridos': 'sum',
-            'severity_score': 'mean',
-            'composite_risk_score': 'mean'
-        }).reset_index()
+    if has_dimensions(cube, 'day_of_month'):
+        dom_agg = rollup_cube(cube, 'day_of_month', RISK_MEASURES).reset_index()
         dom_agg['time_dimension'] = 'day_of_month'
         dom_agg['time_value'] = 'Dia ' + dom_agg['day_of_month'].astype(str)
         time_dims.append(dom_agg.drop('day_of_month', axis=1))
     
-    if 'month' in df.columns and 'month_name' in df.columns:
-        month_agg = df.groupby(['month', 'month_name']).agg({
-            'id': 'count',
-            'mortos': 'sum',
-            'feridos': 'sum',
-            'severity_score': 'mean',
-            'composite_risk_score': 'mean'
-        }).reset_index()
+    if has_dimensions(cube, ['month', 'month_name']):
+        month_agg = rollup_cube(cube, ['month', 'month_name'], RISK_MEASURES).reset_index()
         month_agg['time_dimension'] = 'month'
         month_agg['time_value'] = month_agg['month_name']
         time_dims.append(month_agg.drop(['month', 'month_name'], axis=1))
@@ -119,49 +107,35 @@ def aggregate_risk_by_time(df: pd.DataFrame) -> pd.DataFrame:
     return pd.DataFrame()
 
 
-def aggregate_risk_by_location(df: pd.DataFrame) -> pd.DataFrame:
+TOP_VALUE_COLUMNS = ['causa_acidente', 'tipo_acidente']
+
+
+def aggregate_risk_by_location(cube: dict) -> pd.DataFrame:
     loc_dims = []
     
-    if 'uf' in df.columns:
-        state_agg = df.groupby('uf').agg({
-            'id': 'count',
-            'mortos': 'sum',
-            'feridos': 'sum',
-            'severity_score': 'mean',
-            'composite_risk_score': 'mean',
-            'causa_acidente': lambda x: x.mode()[0] if len(x.mode()) > 0 else 'Vários',
-            'tipo_acidente': lambda x: x.mode()[0] if len(x.mode()) > 0 else 'Vários'
-        }).reset_index()
+    if has_dimensions(cube, 'uf'):
+        state_agg = rollup_cube(cube, 'uf', RISK_MEASURES).join(
+            rollup_mode(cube, 'uf', TOP_VALUE_COLUMNS, 'Vários')
+        ).reset_index()
         state_agg['location_type'] = 'state'
         state_agg['location_name'] = state_agg['uf']
         loc_dims.append(state_agg.drop('uf', axis=1))
     
-    if 'br' in df.columns:
-        highway_agg = df.groupby('br').agg({
-            'id': 'count',
-            'mortos': 'sum',
-            'feridos': 'sum',
-            'severity_score': 'mean',
-            'composite_risk_score': 'mean',
-            'causa_acidente': lambda x: x.mode()[0] if len(x.mode()) > 0 else 'Vários',
-            'tipo_acidente': lambda x: x.mode()[0] if len(x.mode()) > 0 else 'Vários',
-            'km': 'nunique'
-        }).reset_index()
+    if has_dimensions(cube, 'br'):
+        highway_agg = rollup_cube(cube, 'br', RISK_MEASURES).join(
+            rollup_mode(cube, 'br', TOP_VALUE_COLUMNS, 'Vários')
+        ).join(
+            rollup_nunique(cube, 'br', 'km')
+        ).reset_index()
         highway_agg['location_type'] = 'highway'
         highway_agg['location_name'] = 'BR-' + highway_agg['br'].astype(str)
         highway_agg['accidents_per_100km'] = (highway_agg['id'] / highway_agg['km']) * 100
         loc_dims.append(highway_agg.drop(['br', 'km'], axis=1))
     
-    if 'municipio' in df.columns:
-        city_agg = df.groupby('municipio').agg({
-            'id': 'count',
-            'mortos': 'sum',
-            'feridos': 'sum',
-            'severity_score': 'mean',
-            'composite_risk_score': 'mean',
-            'causa_acidente': lambda x: x.mode()[0] if len(x.mode()) > 0 else 'Vários',
-            'tipo_acidente': lambda x: x.mode()[0] if len(x.mode()) > 0 else 'Vários'
-        }).reset_index().nlargest(50, 'id')
+    if has_dimensions(cube, 'municipio'):
+        city_agg = rollup_cube(cube, 'municipio', RISK_MEASURES).join(
+            rollup_mode(cube, 'municipio', TOP_VALUE_COLUMNS, 'Vários')
+        ).reset_index().nlargest(50, 'id')
         city_agg['location_type'] = 'city'
         city_agg['location_name'] = city_agg['municipio']
         loc_dims.append(city_agg.drop('municipio', axis=1))
@@ -191,45 +165,29 @@ def aggregate_risk_by_location(df: pd.DataFrame) -> pd.DataFrame:
     return pd.DataFrame()
 
 
-def create_danger_rankings(df: pd.DataFrame) -> pd.DataFrame:
+def create_danger_rankings(cube: dict) -> pd.DataFrame:
     rankings = []
     
-    if 'hour' in df.columns:
-        hour_rank = df.groupby('hour').agg({
-            'id': 'count',
-            'mortos': 'sum',
-            'composite_risk_score': 'mean'
-        }).reset_index().nlargest(10, 'id')
+    if has_dimensions(cube, 'hour'):
+        hour_rank = rollup_cube(cube, 'hour', RANKING_MEASURES).reset_index().nlargest(10, 'id')
         hour_rank['category'] = 'worst_hours'
         hour_rank['item_name'] = hour_rank['hour'].astype(str) + 'h'
         rankings.append(hour_rank.drop('hour', axis=1))
     
-    if 'day_of_week_name_pt' in df.columns:
-        day_rank = df.groupby('day_of_week_name_pt').agg({
-            'id': 'count',
-            'mortos': 'sum',
-            'composite_risk_score': 'mean'
-        }).reset_index().nlargest(7, 'id')
+    if has_dimensions(cube, 'day_of_week_name_pt'):
+        day_rank = rollup_cube(cube, 'day_of_week_name_pt', RANKING_MEASURES).reset_index().nlargest(7, 'id')
         day_rank['category'] = 'worst_days'
         day_rank['item_name'] = day_rank['day_of_week_name_pt']
         rankings.append(day_rank.drop('day_of_week_name_pt', axis=1))
     
-    if 'uf' in df.columns:
-        state_rank = df.groupby('uf').agg({
-            'id': 'count',
-            'mortos': 'sum',
-            'composite_risk_score': 'mean'
-        }).reset_index().nlargest(10, 'id')
+    if has_dimensions(cube, 'uf'):
+        state_rank = rollup_cube(cube, 'uf', RANKING_MEASURES).reset_index().nlargest(10, 'id')
         state_rank['category'] = 'worst_states'
         state_rank['item_name'] = state_rank['uf']
         rankings.append(state_rank.drop('uf', axis=1))
     
-    if 'br' in df.columns:
-        highway_rank = df.groupby('br').agg({
-            'id': 'count',
-            'mortos': 'sum',
-            'composite_risk_score': 'mean'
-        }).reset_index().nlargest(10, 'id')
+    if has_dimensions(cube, 'br'):
+        highway_rank = rollup_cube(cube, 'br', RANKING_MEASURES).reset_index().nlargest(10, 'id')
         highway_rank['category'] = 'worst_highways'
         highway_rank['item_name'] = 'BR-' + highway_rank['br'].astype(str)
         rankings.append(highway_rank.drop('br', axis=1))
@@ -239,7 +197,7 @@ def create_danger_rankings(df: pd.DataFrame) -> pd.DataFrame:
         result.columns = ['accident_count', 'deaths', 'risk_score', 'category', 'item_name']
         result['rank'] = result.groupby('category')['accident_count'].rank(ascending=False)
         
-        avg_accidents = df['id'].count() / len(result['category'].unique())
+        avg_accidents = cube_total(cube, 'id') / len(result['category'].unique())
         result['vs_average_pct'] = ((result['accident_count'] - avg_accidents) / avg_accidents) * 100
         
         logger.info(f"   ✓ Created {len(result)} danger rankings")
@@ -323,12 +281,13 @@ def create_daily_calendar(df: pd.DataFrame) -> pd.DataFrame:
     return daily
 
 
-def generate_worst_answers(df: pd.DataFrame) -> pd.DataFrame:
+def generate_worst_answers(cube: dict) -> pd.DataFrame:
     answers = []
     
-    if 'hour' in df.columns:
-        worst_hour = df.groupby('hour').size().idxmax()
-        count = df[df['hour'] == worst_hour].shape[0]
+    if has_dimensions(cube, 'hour'):
+        hour_counts = rollup_cube(cube, 'hour', ['rows'])['rows']
+        worst_hour = hour_counts.idxmax()
+        count = hour_counts[worst_hour]
         answers.append({
             'question_id': 1,
             'question': 'Qual o pior horário para dirigir?',
@@ -337,9 +296,10 @@ def generate_worst_answers(df: pd.DataFrame) -> pd.DataFrame:
             'explanation': 'Horário de pico com maior volume de acidentes'
         })
     
-    if 'day_of_week_name_pt' in df.columns:
-        worst_day = df.groupby('day_of_week_name_pt').size().idxmax()
-        count = df[df['day_of_week_name_pt'] == worst_day].shape[0]
+    if has_dimensions(cube, 'day_of_week_name_pt'):
+        day_counts = rollup_cube(cube, 'day_of_week_name_pt', ['rows'])['rows']
+        worst_day = day_counts.idxmax()
+        count = day_counts[worst_day]
         answers.append({
             'question_id': 2,
             'question': 'Qual o pior dia da semana?',
@@ -348,9 +308,10 @@ def generate_worst_answers(df: pd.DataFrame) -> pd.DataFrame:
             'explanation': 'Dia com maior volume de acidentes'
         })
     
-    if 'uf' in df.columns:
-        worst_state = df.groupby('uf').size().idxmax()
-        count = df[df['uf'] == worst_state].shape[0]
+    if has_dimensions(cube, 'uf'):
+        state_counts = rollup_cube(cube, 'uf', ['rows'])['rows']
+        worst_state = state_counts.idxmax()
+        count = state_counts[worst_state]
         answers.append({
             'question_id': 3,
             'question': 'Qual o estado mais perigoso?',
@@ -359,9 +320,10 @@ def generate_worst_answers(df: pd.DataFrame) -> pd.DataFrame:
             'explanation': 'Estado com maior volume de acidentes'
         })
     
-    if 'br' in df.columns:
-        worst_highway = df.groupby('br').size().idxmax()
-        count = df[df['br'] == worst_highway].shape[0]
+    if has_dimensions(cube, 'br'):
+        highway_counts = rollup_cube(cube, 'br', ['rows'])['rows']
+        worst_highway = highway_counts.idxmax()
+        count = highway_counts[worst_highway]
         answers.append({
             'question_id': 4,
             'question': 'Qual a rodovia mais perigosa?',
@@ -385,8 +347,8 @@ def prepare_map_points(df: pd.DataFrame) -> pd.DataFrame:
         'tooltip_text', 'popup_html'
     ]
     
-    available_cols = [col for col in map_cols if col in df.columns]
-    map_df = df[available_cols].copy()
+    source_cols = map_cols + [col for col in POPUP_FIELDS if col not in map_cols]
+    map_df = df[[col for col in source_cols if col in df.columns]]
     
     map_df = map_df[
         (map_df['latitude'].notna()) &
@@ -395,6 +357,9 @@ def prepare_map_points(df: pd.DataFrame) -> pd.DataFrame:
         (map_df['longitude'].between(-75, -30))
     ]
     
+    map_df = add_popup_fields(map_df)
+    map_df = map_df[[col for col in map_cols if col in map_df.columns]]
+    
     logger.info(f"   ✓ Prepared {len(map_df):,} map points with valid coordinates")
     
     return map_df
@@ -411,9 +376,9 @@ if __name__ == "__main__":
     df_clean = clean_data(df_raw)
     df_enriched = enrich_data(df_clean)
     df_risks = calculate_risks(df_enriched)
-    df_geo, clusters, segments = analyze_geography(df_risks)
+    df_geo, clusters, segments, sweep = analyze_geography(df_risks)
     
-    aggregated = aggregate_data(df_geo, clusters, segments)
+    aggregated = aggregate_data(df_geo, clusters, segments, sweep)
     
     print(f"\n✓ Aggregation complete")
     print(f"✓ Created {len(aggregated)} output files")
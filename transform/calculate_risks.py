@@ -2,52 +2,64 @@ import pandas as pd
 import numpy as np
 import logging
 from utils import config
-from utils.helpers import save_dataframe
+from utils.helpers import save_dataframe, apply_dtype_plan
+from utils.group_stats import create_group_store, lookup_group_stats, invalidate_group_stats
 
 logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
 logger = logging.getLogger(__name__)
 
 
-def calculate_risks(df: pd.DataFrame) -> pd.DataFrame:
+def calculate_risks(df: pd.DataFrame, group_store: dict = None) -> pd.DataFrame:
     logger.info("="*80)
     logger.info("RISK CALCULATION PHASE - Computing risk scores")
     logger.info("="*80)
     
-    df = df.copy()
+    if group_store is None:
+        group_store = create_group_store(df)
     
     logger.info("\n1. Calculating time risk scores...")
-    df = calculate_time_risk_scores(df)
+    df = calculate_time_risk_scores(df, group_store)
     
     logger.info("\n2. Calculating location risk scores...")
-    df = calculate_location_risk_scores(df)
+    df = calculate_location_risk_scores(df, group_store)
     
     logger.info("\n3. Calculating condition risk scores...")
-    df = calculate_condition_risk_scores(df)
+    df = calculate_condition_risk_scores(df, group_store)
     
     logger.info("\n4. Calculating composite risk scores...")
     df = calculate_composite_risk_score(df)
+    invalidate_group_stats(group_store, ['composite_risk_score'])
     
     logger.info("\n5. Calculating probability indices...")
     df = calculate_probability_indices(df)
     
     logger.info("\n6. Assigning danger rankings...")
-    df = assign_rankings(df)
+    df = assign_rankings(df, group_store)
     
     logger.info("\n7. Identifying high-risk accidents...")
     df = identify_high_risk(df)
     
+    df = apply_dtype_plan(df)
+    
     logger.info("\n✓ Risk calculation complete")
     
     return df
 
 
-def calculate_time_risk_scores(df: pd.DataFrame) -> pd.DataFrame:
+GROUP_STAT_NAMES = {'id': 'accidents', 'km': 'km_coverage'}
+
+
+def get_group_stats(key: str, agg: dict, group_store: dict) -> pd.DataFrame:
+    return lookup_group_stats(group_store, key, agg).rename(columns=GROUP_STAT_NAMES)
+
+
+def calculate_time_risk_scores(df: pd.DataFrame, group_store: dict) -> pd.DataFrame:
     if 'hour' in df.columns:
-        hour_stats = df.groupby('hour').agg({
+        hour_stats = get_group_stats('hour', {
             'id': 'count',
             'mortos': 'sum',
             'feridos': 'sum'
-        }).rename(columns={'id': 'accidents'})
+        }, group_store)
         
         hour_stats['fatality_rate'] = hour_stats['mortos'] / hour_stats['accidents'] * 100
         
@@ -62,10 +74,10 @@ def calculate_time_risk_scores(df: pd.DataFrame) -> pd.DataFrame:
         df['hour_risk_score'] = df['hour'].map(hour_stats['risk_score']).fillna(50)
     
     if 'day_of_week' in df.columns:
-        dow_stats = df.groupby('day_of_week').agg({
+        dow_stats = get_group_stats('day_of_week', {
             'id': 'count',
             'mortos': 'sum'
-        }).rename(columns={'id': 'accidents'})
+        }, group_store)
         
         dow_stats['fatality_rate'] = dow_stats['mortos'] / dow_stats['accidents'] * 100
         avg_accidents = dow_stats['accidents'].mean()
@@ -90,13 +102,13 @@ def calculate_time_risk_scores(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def calculate_location_risk_scores(df: pd.DataFrame) -> pd.DataFrame:
+def calculate_location_risk_scores(df: pd.DataFrame, group_store: dict) -> pd.DataFrame:
     if 'br' in df.columns:
-        highway_stats = df.groupby('br').agg({
+        highway_stats = get_group_stats('br', {
             'id': 'count',
             'mortos': 'sum',
             'km': 'nunique'
-        }).rename(columns={'id': 'accidents', 'km': 'km_coverage'})
+        }, group_store)
         
         highway_stats['accidents_per_km'] = highway_stats['accidents'] / highway_stats['km_coverage'].replace(0, 1)
         highway_stats['fatality_rate'] = highway_stats['mortos'] / highway_stats['accidents'] * 100
@@ -112,10 +124,10 @@ def calculate_location_risk_scores(df: pd.DataFrame) -> pd.DataFrame:
         df['highway_risk_score'] = df['br'].map(highway_stats['risk_score']).fillna(50)
     
     if 'uf' in df.columns:
-        state_stats = df.groupby('uf').agg({
+        state_stats = get_group_stats('uf', {
             'id': 'count',
             'mortos': 'sum'
-        }).rename(columns={'id': 'accidents'})
+        }, group_store)
         
         state_stats['fatality_rate'] = state_stats['mortos'] / state_stats['accidents'] * 100
         avg_accidents = state_stats['accidents'].mean()
@@ -126,7 +138,7 @@ def calculate_location_risk_scores(df: pd.DataFrame) -> pd.DataFrame:
             (state_stats['fatality_rate'] / avg_fatality) * 50
         )
         
-        df['state_risk_score'] = df['uf'].map(state_stats['risk_score']).fillna(50)
+        df['state_risk_score'] = df['uf'].map(state_stats['risk_score']).astype(float).fillna(50)
     
     if 'highway_risk_score' in df.columns and 'state_risk_score' in df.columns:
         df['location_risk_score'] = (df['highway_risk_score'] + df['state_risk_score']) / 2
@@ -140,32 +152,32 @@ def calculate_location_risk_scores(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def calculate_condition_risk_scores(df: pd.DataFrame) -> pd.DataFrame:
+def calculate_condition_risk_scores(df: pd.DataFrame, group_store: dict) -> pd.DataFrame:
     if 'condicao_metereologica' in df.columns:
-        weather_stats = df.groupby('condicao_metereologica').agg({
+        weather_stats = get_group_stats('condicao_metereologica', {
             'id': 'count',
             'mortos': 'sum'
-        }).rename(columns={'id': 'accidents'})
+        }, group_store)
         
         weather_stats['fatality_rate'] = weather_stats['mortos'] / weather_stats['accidents'] * 100
         avg_fatality = weather_stats['fatality_rate'].mean()
         
         weather_stats['risk_score'] = (weather_stats['fatality_rate'] / avg_fatality) * 100
         
-        df['weather_risk_score'] = df['condicao_metereologica'].map(weather_stats['risk_score']).fillna(50)
+        df['weather_risk_score'] = df['condicao_metereologica'].map(weather_stats['risk_score']).astype(float).fillna(50)
     
     if 'tipo_pista' in df.columns:
-        road_stats = df.groupby('tipo_pista').agg({
+        road_stats = get_group_stats('tipo_pista', {
             'id': 'count',
             'mortos': 'sum'
-        }).rename(columns={'id': 'accidents'})
+        }, group_store)
         
         road_stats['fatality_rate'] = road_stats['mortos'] / road_stats['accidents'] * 100
         avg_fatality = road_stats['fatality_rate'].mean()
         
         road_stats['risk_score'] = (road_stats['fatality_rate'] / avg_fatality) * 100
         
-        df['road_risk_score'] = df['tipo_pista'].map(road_stats['risk_score']).fillna(50)
+        df['road_risk_score'] = df['tipo_pista'].map(road_stats['risk_score']).astype(float).fillna(50)
     
     risk_scores = [col for col in ['weather_risk_score', 'road_risk_score'] if col in df.columns]
     if risk_scores:
@@ -218,21 +230,21 @@ def calculate_probability_indices(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def assign_rankings(df: pd.DataFrame) -> pd.DataFrame:
+def assign_rankings(df: pd.DataFrame, group_store: dict) -> pd.DataFrame:
     if 'hour' in df.columns:
-        hour_danger = df.groupby('hour')['id'].count().rank(ascending=False)
+        hour_danger = get_group_stats('hour', {'id': 'count'}, group_store)['accidents'].rank(ascending=False)
         df['hour_danger_rank'] = df['hour'].map(hour_danger)
     
     if 'day_of_week' in df.columns:
-        day_danger = df.groupby('day_of_week')['id'].count().rank(ascending=False)
+        day_danger = get_group_stats('day_of_week', {'id': 'count'}, group_store)['accidents'].rank(ascending=False)
         df['day_danger_rank'] = df['day_of_week'].map(day_danger)
     
     if 'uf' in df.columns:
-        state_danger = df.groupby('uf')['id'].count().rank(ascending=False)
-        df['state_danger_rank'] = df['uf'].map(state_danger)
+        state_danger = get_group_stats('uf', {'id': 'count'}, group_store)['accidents'].rank(ascending=False)
+        df['state_danger_rank'] = df['uf'].map(state_danger).astype(float)
     
     if 'br' in df.columns:
-        highway_danger = df.groupby('br')['id'].count().rank(ascending=False)
+        highway_danger = get_group_stats('br', {'id': 'count'}, group_store)['accidents'].rank(ascending=False)
         df['highway_danger_rank'] = df['br'].map(highway_danger)
     
     logger.info("   ✓ Assigned danger rankings")
@@ -2,7 +2,8 @@ import pandas as pd
 import numpy as np
 import logging
 from utils import config
-from utils.helpers import convert_decimal_comma_to_dot, normalize_text, save_dataframe
+from utils.helpers import (convert_decimal_comma_series, normalize_text_series, parse_datetime_series,
+                           save_dataframe, apply_dtype_plan)
 
 logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
 logger = logging.getLogger(__name__)
@@ -13,7 +14,6 @@ def clean_data(df: pd.DataFrame) -> pd.DataFrame:
     logger.info("CLEAN PHASE - Cleaning and standardizing data")
     logger.info("="*80)
     
-    df = df.copy()
     initial_count = len(df)
     
     logger.info("\n1. Converting numeric fields...")
@@ -31,6 +31,8 @@ def clean_data(df: pd.DataFrame) -> pd.DataFrame:
     logger.info("\n5. Validating cleaned data...")
     validate_cleaned_data(df)
     
+    df = apply_dtype_plan(df)
+    
     final_count = len(df)
     logger.info(f"\n✓ Cleaning complete: {initial_count:,} → {final_count:,} records")
     
@@ -42,15 +44,15 @@ def clean_data(df: pd.DataFrame) -> pd.DataFrame:
 def convert_numeric_fields(df: pd.DataFrame) -> pd.DataFrame:
     if 'km' in df.columns:
         logger.info("   Converting km field...")
-        df['km'] = df['km'].apply(convert_decimal_comma_to_dot)
+        df['km'] = convert_decimal_comma_series(df['km'])
     
     if 'latitude' in df.columns:
         logger.info("   Converting latitude field...")
-        df['latitude'] = df['latitude'].apply(convert_decimal_comma_to_dot)
+        df['latitude'] = convert_decimal_comma_series(df['latitude'])
     
     if 'longitude' in df.columns:
         logger.info("   Converting longitude field...")
-        df['longitude'] = df['longitude'].apply(convert_decimal_comma_to_dot)
+        df['longitude'] = convert_decimal_comma_series(df['longitude'])
     
     int_fields = ['id', 'br', 'pessoas', 'mortos', 'feridos_leves', 
                   'feridos_graves', 'ilesos', 'ignorados', 'feridos', 'veiculos']
@@ -65,35 +67,45 @@ def convert_numeric_fields(df: pd.DataFrame) -> pd.DataFrame:
 
 
 def parse_datetime_fields(df: pd.DataFrame) -> pd.DataFrame:
+    time_of_day = None
+    
     if 'data_inversa' in df.columns:
         logger.info("   Parsing date field...")
-        df['date'] = pd.to_datetime(df['data_inversa'], format='%Y-%m-%d', errors='coerce')
+        date_codes, dates = parse_datetime_series(df['data_inversa'], config.DATE_FORMAT)
         
-        df['year'] = df['date'].dt.year
-        df['month'] = df['date'].dt.month
-        df['day_of_month'] = df['date'].dt.day
-        df['day_of_week'] = df['date'].dt.dayofweek
-        df['week_of_year'] = df['date'].dt.isocalendar().week
+        calendar = pd.DataFrame({'date': dates})
+        calendar['year'] = dates.dt.year
+        calendar['month'] = dates.dt.month
+        calendar['day_of_month'] = dates.dt.day
+        calendar['day_of_week'] = dates.dt.dayofweek
+        calendar['week_of_year'] = dates.dt.isocalendar().week
+        
+        df = expand_unique_fields(df, calendar, date_codes)
     
     if 'horario' in df.columns:
         logger.info("   Parsing time field...")
-        df['time'] = pd.to_datetime(df['horario'], format='%H:%M:%S', errors='coerce').dt.time
+        time_codes, times = parse_datetime_series(df['horario'], config.TIME_FORMAT)
+        
+        clock = pd.DataFrame({'time': times.dt.time, 'hour': times.dt.hour})
         
-        df['hour'] = pd.to_datetime(df['horario'], format='%H:%M:%S', errors='coerce').dt.hour
+        df = expand_unique_fields(df, clock, time_codes)
+        time_of_day = (times - times.dt.normalize()).take(time_codes).set_axis(df.index)
     
-    if 'date' in df.columns and 'horario' in df.columns:
+    if 'date' in df.columns and time_of_day is not None:
         logger.info("   Creating datetime field...")
-        df['datetime'] = pd.to_datetime(
-            df['data_inversa'] + ' ' + df['horario'],
-            format='%Y-%m-%d %H:%M:%S',
-            errors='coerce'
-        )
+        df['datetime'] = df['date'] + time_of_day
     
     logger.info("   ✓ Parsed date and time fields")
     
     return df
 
 
+def expand_unique_fields(df: pd.DataFrame, table: pd.DataFrame, codes) -> pd.DataFrame:
+    for col in table.columns:
+        df[col] = table[col].take(codes).set_axis(df.index)
+    return df
+
+
 def standardize_text_fields(df: pd.DataFrame) -> pd.DataFrame:
     text_fields = ['uf', 'municipio', 'causa_acidente', 'tipo_acidente',
                    'classificacao_acidente', 'fase_dia', 'sentido_via',
@@ -102,7 +114,7 @@ def standardize_text_fields(df: pd.DataFrame) -> pd.DataFrame:
     
     for field in text_fields:
         if field in df.columns:
-            df[field] = df[field].apply(normalize_text)
+            df[field] = normalize_text_series(df[field])
     
     logger.info(f"   ✓ Standardized {len([f for f in text_fields if f in df.columns])} text fields")
     
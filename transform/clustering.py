@@ -0,0 +1,408 @@
+import pandas as pd
+import numpy as np
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from sklearn.cluster import DBSCAN
+from sklearn.neighbors import NearestNeighbors
+from utils import config
+
+logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+GRID_PAIR_BATCH = 4_000_000
+GRID_SOURCE_CHUNK = 250_000
+GRID_PROBE_BLOCK = 64
+
+
+def cluster_coordinates(latitude: np.ndarray, longitude: np.ndarray, eps_km: float, min_samples: int,
+                        sample_weight: np.ndarray = None, engine: str = None) -> np.ndarray:
+    return sweep_cluster_coordinates(latitude, longitude, [(eps_km, min_samples)], sample_weight, engine)[0]
+
+
+def sweep_cluster_coordinates(latitude: np.ndarray, longitude: np.ndarray, settings: list,
+                              sample_weight: np.ndarray = None, engine: str = None,
+                              partition_keys: np.ndarray = None) -> list:
+    engine = engine or config.CLUSTER_ENGINE
+    if engine not in CLUSTER_ENGINES:
+        raise ValueError(f"Unknown clustering engine '{engine}', expected one of {sorted(CLUSTER_ENGINES)}")
+    
+    settings_rad = [(eps_km / EARTH_RADIUS_KM, min_samples) for eps_km, min_samples in settings]
+    
+    if not config.CLUSTER_COLLAPSE_DUPLICATES:
+        return run_clustering(np.radians(latitude), np.radians(longitude), settings_rad, sample_weight, engine,
+                              partition_keys)
+    
+    codes, first = collapse_coordinates(latitude, longitude, config.CLUSTER_COORDINATE_DECIMALS)
+    weights = np.bincount(codes, weights=sample_weight, minlength=len(first))
+    logger.info(f"   Collapsed {len(codes):,} points into {len(first):,} unique coordinates")
+    
+    labels = run_clustering(np.radians(latitude[first]), np.radians(longitude[first]), settings_rad, weights, engine,
+                            None if partition_keys is None else np.asarray(partition_keys)[first])
+    return [setting_labels[codes] for setting_labels in labels]
+
+
+def run_clustering(lat: np.ndarray, lon: np.ndarray, settings: list, weights: np.ndarray, engine: str,
+                   partition_keys: np.ndarray = None) -> list:
+    max_workers = config.CLUSTER_WORKERS or os.cpu_count() or 1
+    if max_workers > 1:
+        partitions = partition_points(lat, lon, max(eps_rad for eps_rad, _ in settings), partition_keys)
+        if len(partitions) > 1:
+            return run_partitioned(lat, lon, settings, weights, engine, partitions, max_workers)
+    
+    return [labels for labels, _ in CLUSTER_ENGINES[engine](lat, lon, settings, weights)]
+
+
+def collapse_coordinates(latitude: np.ndarray, longitude: np.ndarray, decimals: int = None) -> tuple:
+    if decimals is not None:
+        latitude, longitude = np.round(latitude, decimals), np.round(longitude, decimals)
+    
+    coords = pd.DataFrame({'latitude': latitude, 'longitude': longitude})
+    codes = coords.groupby(['latitude', 'longitude'], sort=False).ngroup().values
+    first = np.unique(codes, return_index=True)[1]
+    
+    return codes, first
+
+
+def run_dbscan(lat: np.ndarray, lon: np.ndarray, settings: list, sample_weight: np.ndarray = None) -> list:
+    coords = np.column_stack([lat, lon])
+    
+    if len(settings) == 1:
+        eps_rad, min_samples = settings[0]
+        models = [DBSCAN(eps=eps_rad, min_samples=min_samples, metric='haversine')
+                  .fit(coords, sample_weight=sample_weight)]
+    else:
+        max_eps_rad = max(eps_rad for eps_rad, _ in settings)
+        graph = NearestNeighbors(radius=max_eps_rad, metric='haversine').fit(coords).radius_neighbors_graph(
+            mode='distance')
+        models = [DBSCAN(eps=eps_rad, min_samples=min_samples, metric='precomputed')
+                  .fit(graph, sample_weight=sample_weight)
+                  for eps_rad, min_samples in settings]
+    
+    results = []
+    for model in models:
+        is_core = np.zeros(len(coords), dtype=bool)
+        is_core[model.core_sample_indices_] = True
+        results.append((model.labels_, is_core))
+    return results
+
+
+def run_grid_dbscan(lat: np.ndarray, lon: np.ndarray, settings: list, sample_weight: np.ndarray = None) -> list:
+    n = len(lat)
+    weights = np.ones(n) if sample_weight is None else np.asarray(sample_weight, dtype=float)
+    
+    labels = {}
+    for eps_rad in dict.fromkeys(eps_rad for eps_rad, _ in settings):
+        min_samples_values = [min_samples for setting_eps, min_samples in settings if setting_eps == eps_rad]
+        grid = build_grid_index(lat, lon, eps_rad)
+        neighbor_weight = count_neighbor_weight(grid, weights, max(min_samples_values))
+        
+        for min_samples in min_samples_values:
+            is_core = neighbor_weight >= min_samples
+            labels[(eps_rad, min_samples)] = (label_points(grid, weights, is_core, neighbor_weight), is_core)
+    
+    return [labels[setting] for setting in settings]
+
+
+def count_neighbor_weight(grid: dict, weights: np.ndarray, min_samples: int) -> np.ndarray:
+    n = len(weights)
+    
+    # every point of a cell is within eps of the others, so cells already holding min_samples are all core
+    neighbor_weight = np.bincount(grid['cell_index'], weights=weights)[grid['cell_index']]
+    sparse = np.flatnonzero(neighbor_weight < min_samples)
+    outer_offsets = grid['offsets'][grid['offsets'] != 0]
+    for source, target in iter_neighbor_pairs(grid, sparse, np.arange(n), outer_offsets):
+        neighbor_weight += np.bincount(source, weights=weights[target], minlength=n)
+    
+    return neighbor_weight
+
+
+def label_points(grid: dict, weights: np.ndarray, is_core: np.ndarray, neighbor_weight: np.ndarray) -> np.ndarray:
+    n = len(weights)
+    labels = np.full(n, -1, dtype=np.int64)
+    core = np.flatnonzero(is_core)
+    if len(core) == 0:
+        return labels
+    
+    component = connect_core_cells(grid, core)
+    first_core = np.full(component.max() + 1, n)
+    np.minimum.at(first_core, component, core)
+    rank = np.empty(len(first_core), dtype=np.int64)
+    rank[np.argsort(first_core, kind='stable')] = np.arange(len(first_core))
+    labels[core] = rank[component]
+    
+    border = np.flatnonzero(~is_core & (neighbor_weight > weights))
+    border_label = np.full(n, np.iinfo(np.int64).max)
+    for source, target in iter_neighbor_pairs(grid, border, core, grid['offsets']):
+        np.minimum.at(border_label, source, labels[target])
+    labels[border] = np.where(border_label[border] < np.iinfo(np.int64).max, border_label[border], -1)
+    
+    return labels
+
+
+def project_equal_area(lat: np.ndarray, lon: np.ndarray) -> tuple:
+    lat0 = (lat.min() + lat.max()) / 2
+    lon0 = (lon.min() + lon.max()) / 2
+    
+    cos_c = np.sin(lat0) * np.sin(lat) + np.cos(lat0) * np.cos(lat) * np.cos(lon - lon0)
+    k = np.sqrt(2 / (1 + cos_c))
+    x = EARTH_RADIUS_KM * k * np.cos(lat) * np.sin(lon - lon0)
+    y = EARTH_RADIUS_KM * k * (np.cos(lat0) * np.sin(lat) - np.sin(lat0) * np.cos(lat) * np.cos(lon - lon0))
+    
+    max_angle = np.arccos(np.clip(cos_c.min(), -1, 1))
+    return x, y, max_angle
+
+
+def build_grid_index(lat: np.ndarray, lon: np.ndarray, eps_rad: float) -> dict:
+    x, y, max_angle = project_equal_area(lat, lon)
+    
+    # Lambert azimuthal equal-area scales distances between cos(c/2) and 1/cos(c/2) at angular distance c
+    # from the center: cells are sized so any two points sharing one are eps-neighbors, and the search
+    # reach covers every true eps-neighbor
+    scale = np.cos(min(max_angle + eps_rad, np.pi * 0.9) / 2)
+    eps_km = eps_rad * EARTH_RADIUS_KM
+    cell_km = eps_km * scale / np.sqrt(2) * (1 - 1e-6)
+    reach_km = eps_km / scale * (1 + 1e-6)
+    reach = int(np.ceil(reach_km / cell_km))
+    
+    cell_x = np.floor((x - x.min()) / cell_km).astype(np.int64) + reach
+    cell_y = np.floor((y - y.min()) / cell_km).astype(np.int64) + reach
+    height = cell_y.max() + reach + 1
+    cell = cell_x * height + cell_y
+    
+    order = np.argsort(cell, kind='stable')
+    keys, cell_index = np.unique(cell, return_inverse=True)
+    steps = range(-reach, reach + 1)
+    
+    return {
+        'lat': lat, 'lon': lon, 'cos_lat': np.cos(lat), 'x': x, 'y': y, 'cell': cell,
+        'cell_index': cell_index, 'order': order, 'reach_km': reach_km,
+        'offsets': np.array([dx * height + dy for dx in steps for dy in steps]),
+        'max_rdist': np.sin(eps_rad / 2) ** 2
+    }
+
+
+def iter_neighbor_pairs(grid: dict, sources: np.ndarray, targets: np.ndarray, offsets: np.ndarray):
+    order = grid['order']
+    if len(targets) < len(order):
+        is_target = np.zeros(len(order), dtype=bool)
+        is_target[targets] = True
+        order = order[is_target[order]]
+    
+    if len(sources) == 0 or len(order) == 0:
+        return
+    
+    keys, starts, counts = np.unique(grid['cell'][order], return_index=True, return_counts=True)
+    
+    for chunk in np.array_split(sources, -(-len(sources) // GRID_SOURCE_CHUNK)):
+        neighbor_cells = grid['cell'][chunk][:, None] + offsets[None, :]
+        position = np.minimum(np.searchsorted(keys, neighbor_cells), len(keys) - 1)
+        found = keys[position] == neighbor_cells
+        block_start = np.where(found, starts[position], 0)
+        block_count = np.where(found, counts[position], 0)
+        
+        batch = np.cumsum(block_count.sum(axis=1)) // GRID_PAIR_BATCH
+        for rows in np.split(np.arange(len(chunk)), np.flatnonzero(np.diff(batch)) + 1):
+            count = block_count[rows].ravel()
+            total = count.sum()
+            if total == 0:
+                continue
+            
+            source = np.repeat(np.repeat(chunk[rows], len(offsets)), count)
+            block_end = np.cumsum(count)
+            within = np.arange(total) - np.repeat(block_end - count, count)
+            target = order[np.repeat(block_start[rows].ravel(), count) + within]
+            
+            close = haversine_rdist(grid, source, target) <= grid['max_rdist']
+            yield source[close], target[close]
+
+
+def connect_core_cells(grid: dict, core: np.ndarray) -> np.ndarray:
+    order = np.argsort(grid['cell'][core], kind='stable')
+    members = core[order]
+    cells, starts, counts = np.unique(grid['cell'][members], return_index=True, return_counts=True)
+    x, y = grid['x'][members], grid['y'][members]
+    box = [np.minimum.reduceat(x, starts), np.maximum.reduceat(x, starts),
+           np.minimum.reduceat(y, starts), np.maximum.reduceat(y, starts)]
+    
+    pairs = []
+    for offset in grid['offsets'][grid['offsets'] > 0]:
+        position = np.minimum(np.searchsorted(cells, cells + offset), len(cells) - 1)
+        found = np.flatnonzero(cells[position] == cells + offset)
+        pairs.append(np.column_stack([found, position[found]]))
+    pairs = np.concatenate(pairs)
+    
+    parent = np.arange(len(cells))
+    
+    def find(cell):
+        while parent[cell] != cell:
+            parent[cell] = parent[parent[cell]]
+            cell = parent[cell]
+        return cell
+    
+    for a, b in pairs.tolist():
+        root_a, root_b = find(a), find(b)
+        if root_a == root_b:
+            continue
+        
+        near_a = members[starts[a]:starts[a] + counts[a]]
+        near_b = members[starts[b]:starts[b] + counts[b]]
+        if any_within_eps(grid, nearest_to_box(grid, near_a, [side[b] for side in box]),
+                          nearest_to_box(grid, near_b, [side[a] for side in box])):
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+    
+    cell_root = np.array([find(cell) for cell in range(len(cells))])
+    component = np.empty(len(core), dtype=np.int64)
+    component[order] = np.repeat(cell_root, counts)
+    return component
+
+
+def nearest_to_box(grid: dict, points: np.ndarray, box: list) -> np.ndarray:
+    x_min, x_max, y_min, y_max = box
+    dx = np.maximum(np.maximum(x_min - grid['x'][points], grid['x'][points] - x_max), 0)
+    dy = np.maximum(np.maximum(y_min - grid['y'][points], grid['y'][points] - y_max), 0)
+    distance = np.hypot(dx, dy)
+    
+    order = np.argsort(distance, kind='stable')
+    return points[order[distance[order] <= grid['reach_km']]]
+
+
+def any_within_eps(grid: dict, points_a: np.ndarray, points_b: np.ndarray) -> bool:
+    if len(points_a) == 0 or len(points_b) == 0:
+        return False
+    
+    # both sides come nearest-first, so a small leading block settles most adjacent dense cells
+    if len(points_a) * len(points_b) > GRID_PROBE_BLOCK ** 2 and any_within_eps(
+            grid, points_a[:GRID_PROBE_BLOCK], points_b[:GRID_PROBE_BLOCK]):
+        return True
+    
+    step = max(1, GRID_PAIR_BATCH // len(points_b))
+    for first in range(0, len(points_a), step):
+        source = np.repeat(points_a[first:first + step], len(points_b))
+        target = np.tile(points_b, len(points_a[first:first + step]))
+        if (haversine_rdist(grid, source, target) <= grid['max_rdist']).any():
+            return True
+    return False
+
+
+def haversine_rdist(grid: dict, source: np.ndarray, target: np.ndarray) -> np.ndarray:
+    sin_lat = np.sin(0.5 * (grid['lat'][source] - grid['lat'][target]))
+    sin_lon = np.sin(0.5 * (grid['lon'][source] - grid['lon'][target]))
+    return sin_lat * sin_lat + grid['cos_lat'][source] * grid['cos_lat'][target] * sin_lon * sin_lon
+
+
+def partition_points(lat: np.ndarray, lon: np.ndarray, eps_rad: float, partition_keys: np.ndarray = None) -> list:
+    x, y, max_angle = project_equal_area(lat, lon)
+    reach_km = eps_rad * EARTH_RADIUS_KM / np.cos(min(max_angle + eps_rad, np.pi * 0.9) / 2) * (1 + 1e-6)
+    
+    if config.CLUSTER_PARTITION == 'uf' and partition_keys is not None:
+        owner = pd.factorize(partition_keys, use_na_sentinel=False)[0]
+    else:
+        tile_x = np.floor((x - x.min()) / config.CLUSTER_PARTITION_KM).astype(np.int64)
+        tile_y = np.floor((y - y.min()) / config.CLUSTER_PARTITION_KM).astype(np.int64)
+        owner = pd.factorize(tile_x * (tile_y.max() + 1) + tile_y)[0]
+    
+    # halo cells are one reach wide: the first ring holds every eps-neighbor of an owned point, the second
+    # every eps-neighbor of the first ring, so core flags are exact for owned points and their neighbors
+    cell_x = np.floor((x - x.min()) / reach_km).astype(np.int64) + 2
+    cell_y = np.floor((y - y.min()) / reach_km).astype(np.int64) + 2
+    height = cell_y.max() + 3
+    cell = cell_x * height + cell_y
+    order = np.argsort(cell, kind='stable')
+    keys, starts, counts = np.unique(cell[order], return_index=True, return_counts=True)
+    
+    def points_near(owned_cells: np.ndarray, ring: int) -> np.ndarray:
+        steps = range(-ring, ring + 1)
+        offsets = np.array([dx * height + dy for dx in steps for dy in steps])
+        near_cells = np.unique((owned_cells[:, None] + offsets[None, :]).ravel())
+        position = np.minimum(np.searchsorted(keys, near_cells), len(keys) - 1)
+        found = position[keys[position] == near_cells]
+        return np.sort(np.concatenate([order[starts[i]:starts[i] + counts[i]] for i in found]))
+    
+    partitions = []
+    for owned in pd.Series(np.arange(len(owner))).groupby(owner).indices.values():
+        owned_cells = np.unique(cell[owned])
+        data = points_near(owned_cells, 2)
+        partitions.append({'data': data, 'owned': np.isin(data, owned)})
+    
+    return partitions
+
+
+def cluster_partition(lat: np.ndarray, lon: np.ndarray, weights: np.ndarray, owned: np.ndarray, settings: list,
+                      engine: str) -> list:
+    results = []
+    for (eps_rad, _), (labels, is_core) in zip(settings, CLUSTER_ENGINES[engine](lat, lon, settings, weights)):
+        core = np.flatnonzero(is_core)
+        border = np.flatnonzero(owned & ~is_core)
+        
+        grid = build_grid_index(lat, lon, eps_rad)
+        pairs = [np.empty((0, 2), dtype=np.int64)]
+        for source, target in iter_neighbor_pairs(grid, border, core, grid['offsets']):
+            pairs.append(np.column_stack([source, labels[target]]))
+        
+        results.append((core, labels[core], is_core[owned], np.unique(np.concatenate(pairs), axis=0)))
+    return results
+
+
+def run_partitioned(lat: np.ndarray, lon: np.ndarray, settings: list, weights: np.ndarray, engine: str,
+                    partitions: list, max_workers: int) -> list:
+    n = len(lat)
+    weights = np.ones(n) if weights is None else np.asarray(weights, dtype=float)
+    logger.info(f"   Clustering {len(partitions)} partitions ({config.CLUSTER_PARTITION}) "
+                f"with {min(max_workers, len(partitions))} worker processes...")
+    
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(partitions))) as executor:
+        futures = [executor.submit(cluster_partition, lat[part['data']], lon[part['data']], weights[part['data']],
+                                   part['owned'], settings, engine)
+                   for part in partitions]
+        partition_results = [future.result() for future in futures]
+    
+    return [merge_partitions(n, partitions, [result[index] for result in partition_results])
+            for index in range(len(settings))]
+
+
+def merge_partitions(n: int, partitions: list, results: list) -> np.ndarray:
+    is_core = np.zeros(n, dtype=bool)
+    links, borders = [], []
+    node_offset = 0
+    
+    for part, (core, core_labels, owned_core, border_pairs) in zip(partitions, results):
+        data = part['data']
+        is_core[data[part['owned']]] = owned_core
+        links.append(np.column_stack([data[core], n + node_offset + core_labels]))
+        borders.append(np.column_stack([data[border_pairs[:, 0]], n + node_offset + border_pairs[:, 1]]))
+        node_offset += (core_labels.max() + 1) if len(core_labels) else 0
+    
+    # a core point shared by two partitions joins their local clusters, which gives the global components
+    links = np.concatenate(links)
+    graph = coo_matrix((np.ones(len(links)), (links[:, 0], links[:, 1])), shape=(n + node_offset, n + node_offset))
+    _, component = connected_components(graph, directed=False)
+    
+    labels = np.full(n, -1, dtype=np.int64)
+    core = np.flatnonzero(is_core)
+    if len(core) == 0:
+        return labels
+    
+    first_core = np.full(component.max() + 1, n)
+    np.minimum.at(first_core, component[core], core)
+    rank = np.full(len(first_core), -1, dtype=np.int64)
+    used = np.flatnonzero(first_core < n)
+    rank[used[np.argsort(first_core[used], kind='stable')]] = np.arange(len(used))
+    labels[core] = rank[component[core]]
+    
+    borders = np.concatenate(borders)
+    border_label = np.full(n, np.iinfo(np.int64).max)
+    np.minimum.at(border_label, borders[:, 0], rank[component[borders[:, 1]]])
+    border = np.unique(borders[:, 0])
+    labels[border] = border_label[border]
+    
+    return labels
+
+
+CLUSTER_ENGINES = {
+    'dbscan': run_dbscan,
+    'grid': run_grid_dbscan,
+}
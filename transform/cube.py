@@ -0,0 +1,88 @@
+import pandas as pd
+import numpy as np
+import logging
+from utils import config
+from utils.helpers import load_dataframe, grouped_mode
+from utils.dense_groupby import aggregate_groups
+
+logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
+CUBE_SUM_COLUMNS = ['mortos', 'feridos']
+CUBE_MEAN_COLUMNS = ['severity_score', 'composite_risk_score']
+
+
+def build_cube(df: pd.DataFrame) -> dict:
+    cube = {}
+    
+    for name, dims in config.CUBE_CUBOIDS.items():
+        dims = [dim for dim in dims if dim in df.columns]
+        if dims:
+            cube[name] = build_cuboid(df, dims)
+    
+    cells = sum(len(cuboid) for cuboid in cube.values())
+    logger.info(f"   ✓ Built cube with {len(cube)} cuboids ({cells:,} cells from {len(df):,} accidents)")
+    
+    return cube
+
+
+def build_cuboid(df: pd.DataFrame, dims: list) -> pd.DataFrame:
+    measures = {'rows': ('id', 'size'), 'id': ('id', 'count')}
+    for col in CUBE_SUM_COLUMNS:
+        if col in df.columns:
+            measures[col] = (col, 'sum')
+    for col in CUBE_MEAN_COLUMNS:
+        if col in df.columns:
+            measures[f'{col}_sum'] = (col, 'sum')
+            measures[f'{col}_count'] = (col, 'count')
+    
+    return aggregate_groups(df, dims, measures, dropna=False).reset_index()
+
+
+def find_cuboid(cube: dict, dims: list) -> pd.DataFrame:
+    candidates = [cuboid for cuboid in cube.values() if all(dim in cuboid.columns for dim in dims)]
+    return min(candidates, key=len) if candidates else None
+
+
+def has_dimensions(cube: dict, dims) -> bool:
+    dims = [dims] if isinstance(dims, str) else list(dims)
+    return find_cuboid(cube, dims) is not None
+
+
+def rollup_cube(cube: dict, dims, columns: list) -> pd.DataFrame:
+    dims = [dims] if isinstance(dims, str) else list(dims)
+    cuboid = find_cuboid(cube, dims)
+    
+    sums = [col for col in columns if col not in CUBE_MEAN_COLUMNS]
+    sums += [f'{col}_{part}' for col in columns if col in CUBE_MEAN_COLUMNS for part in ['sum', 'count']]
+    rolled = aggregate_groups(cuboid, dims, {col: (col, 'sum') for col in sums})
+    
+    for col in columns:
+        if col in CUBE_MEAN_COLUMNS:
+            rolled[col] = rolled[f'{col}_sum'] / rolled[f'{col}_count']
+    
+    return rolled[columns]
+
+
+def rollup_mode(cube: dict, dims, columns: list, fallback=np.nan) -> pd.DataFrame:
+    dims = [dims] if isinstance(dims, str) else list(dims)
+    
+    modes = [
+        grouped_mode(find_cuboid(cube, dims + [col]), dims, [col], fallback, weights='rows')
+        for col in columns
+    ]
+    
+    return pd.concat(modes, axis=1)
+
+
+def rollup_nunique(cube: dict, dims, column: str) -> pd.Series:
+    dims = [dims] if isinstance(dims, str) else list(dims)
+    return find_cuboid(cube, dims + [column]).groupby(dims, observed=True)[column].nunique()
+
+
+def cube_total(cube: dict, column: str):
+    return next(iter(cube.values()))[column].sum()
+
+
+def load_cube() -> dict:
+    return {path.stem: load_dataframe(path, f"cube {path.stem}") for path in sorted(config.CUBE_DIR.glob("*.parquet"))}
@@ -3,9 +3,9 @@ import numpy as np
 import logging
 from utils import config
 from utils.helpers import (get_brazilian_region, get_time_period, is_rush_hour,
-                            categorize_cause, get_marker_color, get_marker_size,
-                            calculate_severity_score, create_popup_html, create_tooltip_text,
-                            save_dataframe, get_day_of_week_pt, get_month_name_pt)
+                            categorize_causes, get_marker_color, get_marker_size,
+                            calculate_severity_scores, save_dataframe, get_day_of_week_pt,
+                            get_month_name_pt, evaluate_text_flags, apply_dtype_plan)
 
 logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
 logger = logging.getLogger(__name__)
@@ -16,8 +16,6 @@ def enrich_data(df: pd.DataFrame) -> pd.DataFrame:
     logger.info("ENRICH PHASE - Adding calculated fields")
     logger.info("="*80)
     
-    df = df.copy()
-    
     logger.info("\n1. Adding temporal dimensions...")
     df = add_temporal_dimensions(df)
     
@@ -36,6 +34,8 @@ def enrich_data(df: pd.DataFrame) -> pd.DataFrame:
     logger.info("\n6. Calculating severity scores...")
     df = add_severity_scores(df)
     
+    df = apply_dtype_plan(df)
+    
     logger.info(f"\n✓ Enrichment complete: {df.shape[1]} total columns")
     
     save_dataframe(df, config.ENRICHED_FILE, "enriched data")
@@ -67,8 +67,8 @@ def add_temporal_dimensions(df: pd.DataFrame) -> pd.DataFrame:
         df['is_business_hours'] = df['hour'].between(8, 18).astype(int)
     
     if 'hour' in df.columns:
-        df['time_bucket_4h'] = (df['hour'] // 4) * 4
-        df['time_bucket_4h'] = df['time_bucket_4h'].astype(str) + '-' + (df['time_bucket_4h'] + 4).astype(str)
+        bucket = ((df['hour'] // 4) * 4).astype('Int64')
+        df['time_bucket_4h'] = (bucket.astype(str) + '-' + (bucket + 4).astype(str)).where(bucket.notna())
     
     logger.info(f"   ✓ Added {8} temporal dimension fields")
     
@@ -95,7 +95,7 @@ def add_geographic_categories(df: pd.DataFrame) -> pd.DataFrame:
 
 def add_accident_characteristics(df: pd.DataFrame) -> pd.DataFrame:
     if 'causa_acidente' in df.columns:
-        df['cause_category'] = df['causa_acidente'].apply(categorize_cause)
+        df['cause_category'] = categorize_causes(df['causa_acidente'])
     
     if 'classificacao_acidente' in df.columns:
         severity_map = {
@@ -103,49 +103,23 @@ def add_accident_characteristics(df: pd.DataFrame) -> pd.DataFrame:
             'Com Vítimas Feridas': 2,
             'Sem Vítimas': 1
         }
-        df['severity_code'] = df['classificacao_acidente'].map(severity_map).fillna(0)
-    
-    if 'condicao_metereologica' in df.columns:
-        df['weather_clear'] = df['condicao_metereologica'].str.contains('Claro|Sol', case=False, na=False).astype(int)
-        df['weather_rain'] = df['condicao_metereologica'].str.contains('Chuva|Garoa', case=False, na=False).astype(int)
-        df['weather_fog'] = df['condicao_metereologica'].str.contains('Nevoeiro|Neblina', case=False, na=False).astype(int)
+        df['severity_code'] = df['classificacao_acidente'].astype(object).map(severity_map).fillna(0)
     
-    if 'tracado_via' in df.columns:
-        df['has_curve'] = df['tracado_via'].str.contains('Curva', case=False, na=False).astype(int)
-        df['has_slope'] = df['tracado_via'].str.contains('Aclive|Declive', case=False, na=False).astype(int)
-        df['has_intersection'] = df['tracado_via'].str.contains('Interse', case=False, na=False).astype(int)
+    flags = evaluate_text_flags(df, config.CHARACTERISTIC_FLAGS)
+    for col in flags.columns:
+        df[col] = flags[col]
     
-    logger.info(f"   ✓ Added {9} accident characteristic fields")
+    logger.info(f"   ✓ Added {len(flags.columns) + 2} accident characteristic fields")
     
     return df
 
 
 def add_risk_flags(df: pd.DataFrame) -> pd.DataFrame:
-    if 'causa_acidente' in df.columns:
-        df['alcohol_involved'] = df['causa_acidente'].str.contains('lcool', case=False, na=False).astype(int)
+    flags = evaluate_text_flags(df, config.RISK_FLAGS)
+    for col in flags.columns:
+        df[col] = flags[col]
     
-    if 'causa_acidente' in df.columns:
-        df['driver_asleep'] = df['causa_acidente'].str.contains('Dormindo', case=False, na=False).astype(int)
-    
-    if 'causa_acidente' in df.columns:
-        df['speed_related'] = df['causa_acidente'].str.contains('Velocidade', case=False, na=False).astype(int)
-    
-    if 'causa_acidente' in df.columns:
-        df['mechanical_failure'] = df['causa_acidente'].str.contains('mec.+nica|el.+trica|pneu|freio', case=False, na=False).astype(int)
-    
-    if 'causa_acidente' in df.columns:
-        df['weather_related'] = df['causa_acidente'].str.contains('Chuva|Pista|gua|neblina', case=False, na=False).astype(int)
-    
-    if 'fase_dia' in df.columns:
-        df['is_night'] = df['fase_dia'].str.contains('Noite', case=False, na=False).astype(int)
-    
-    if 'condicao_metereologica' in df.columns and 'fase_dia' in df.columns:
-        df['poor_visibility'] = (
-            (df['condicao_metereologica'].str.contains('Nevoeiro|Neblina|Chuva', case=False, na=False)) |
-            (df['fase_dia'].str.contains('Noite', case=False, na=False))
-        ).astype(int)
-    
-    logger.info(f"   ✓ Added {7} risk flag fields")
+    logger.info(f"   ✓ Added {len(flags.columns)} risk flag fields")
     
     return df
 
@@ -159,24 +133,15 @@ def add_map_visualization_fields(df: pd.DataFrame) -> pd.DataFrame:
     
     df['marker_opacity'] = 0.7
     
-    if all(col in df.columns for col in ['br', 'km', 'mortos', 'feridos']):
-        df['tooltip_text'] = df.apply(create_tooltip_text, axis=1)
-    
-    required_cols = ['br', 'km', 'municipio', 'uf', 'data_inversa', 'horario',
-                     'tipo_acidente', 'mortos', 'feridos', 'causa_acidente', 'condicao_metereologica']
-    if all(col in df.columns for col in required_cols):
-        logger.info("   Creating popup HTML (this may take a moment)...")
-        df['popup_html'] = df.apply(create_popup_html, axis=1)
-    
-    logger.info(f"   ✓ Added {5} map visualization fields")
+    logger.info(f"   ✓ Added {3} map visualization fields (popups and tooltips are rendered on export)")
     
     return df
 
 
 def add_severity_scores(df: pd.DataFrame) -> pd.DataFrame:
-    required_cols = ['mortos', 'feridos_graves', 'feridos_leves', 'pessoas']
+    required_cols = list(config.SEVERITY_WEIGHTS) + ['pessoas']
     if all(col in df.columns for col in required_cols):
-        df['severity_score'] = df.apply(calculate_severity_score, axis=1)
+        df['severity_score'] = calculate_severity_scores(df)
     
     if 'mortos' in df.columns and 'pessoas' in df.columns:
         df['fatality_rate'] = np.where(
@@ -203,10 +168,11 @@ if __name__ == "__main__":
     
     df_raw = extract_data()
     df_clean = clean_data(df_raw)
+    clean_columns = list(df_clean.columns)
     df_enriched = enrich_data(df_clean)
     
     print(f"\n✓ Enriched data shape: {df_enriched.shape}")
     print(f"\n✓ New columns added:")
-    new_cols = [col for col in df_enriched.columns if col not in df_clean.columns]
+    new_cols = [col for col in df_enriched.columns if col not in clean_columns]
     for col in new_cols:
         print(f"   - {col}")
@@ -1,9 +1,8 @@
 import pandas as pd
-import numpy as np
 import logging
-from sklearn.cluster import DBSCAN
 from utils import config
-from utils.helpers import save_dataframe, calculate_distance_km
+from utils.helpers import save_dataframe, calculate_distance_km, apply_dtype_plan, grouped_mode
+from transform.clustering import sweep_cluster_coordinates
 
 logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
 logger = logging.getLogger(__name__)
@@ -14,26 +13,31 @@ def analyze_geography(df: pd.DataFrame) -> tuple:
     logger.info("GEOGRAPHIC ANALYSIS PHASE - Creating clusters and segments")
     logger.info("="*80)
     
-    df = df.copy()
-    
     logger.info("\n1. Creating geographic clusters...")
-    df, clusters_df = create_geographic_clusters(df)
+    df, clusters_df, sweep_df = create_geographic_clusters(df)
     
     logger.info("\n2. Generating highway segments...")
     segments_df = create_highway_segments(df)
     
+    df = apply_dtype_plan(df)
+    
     logger.info("\n✓ Geographic analysis complete")
     
-    return df, clusters_df, segments_df
+    return df, clusters_df, segments_df, sweep_df
+
+
+CLUSTER_COLUMNS = ['id', 'uf', 'latitude', 'longitude', 'mortos', 'feridos', 'severity_score',
+                   'hour', 'day_of_week', 'causa_acidente']
 
 
 def create_geographic_clusters(df: pd.DataFrame) -> tuple:
-    valid_coords = df[
+    valid_coords = df.loc[
         (df['latitude'].notna()) &
         (df['longitude'].notna()) &
         (df['latitude'].between(-35, 5)) &
-        (df['longitude'].between(-75, -30))
-    ].copy()
+        (df['longitude'].between(-75, -30)),
+        CLUSTER_COLUMNS
+    ]
     
     logger.info(f"   Processing {len(valid_coords):,} accidents with valid coordinates...")
     
@@ -41,38 +45,61 @@ def create_geographic_clusters(df: pd.DataFrame) -> tuple:
         logger.warning("   Not enough valid coordinates for clustering")
         df['cluster_id'] = -1
         df['is_hotspot'] = 0
-        return df, pd.DataFrame()
-    
-    coords = np.radians(valid_coords[['latitude', 'longitude']].values)
+        return df, pd.DataFrame(), pd.DataFrame()
     
-    epsilon_rad = config.CLUSTER_EPSILON_KM / 6371.0
+    main_setting = (config.CLUSTER_EPSILON_KM, config.CLUSTER_MIN_SAMPLES)
+    settings = [main_setting] + [setting for setting in dict.fromkeys(config.CLUSTER_SWEEP) if setting != main_setting]
     
-    logger.info(f"   Running DBSCAN (eps={config.CLUSTER_EPSILON_KM}km, min_samples={config.CLUSTER_MIN_SAMPLES})...")
+    logger.info(f"   Running {config.CLUSTER_ENGINE} clustering (eps={config.CLUSTER_EPSILON_KM}km, "
+                f"min_samples={config.CLUSTER_MIN_SAMPLES})...")
+    if len(settings) > 1:
+        logger.info(f"   Sweeping {len(settings) - 1} more eps/min_samples settings on the same neighbor index...")
     
-    clustering = DBSCAN(
-        eps=epsilon_rad,
-        min_samples=config.CLUSTER_MIN_SAMPLES,
-        metric='haversine'
-    ).fit(coords)
-    
-    valid_coords['cluster_id'] = clustering.labels_
+    labels = sweep_cluster_coordinates(
+        valid_coords['latitude'].values,
+        valid_coords['longitude'].values,
+        settings,
+        partition_keys=valid_coords['uf'].values
+    )
+    valid_coords['cluster_id'] = labels[0]
     
     df['cluster_id'] = -1
     df.loc[valid_coords.index, 'cluster_id'] = valid_coords['cluster_id']
     
     df['is_hotspot'] = (df['cluster_id'] >= 0).astype(int)
     
-    clusters = valid_coords[valid_coords['cluster_id'] >= 0].groupby('cluster_id').agg({
+    clusters = summarize_clusters(valid_coords)
+    
+    if len(clusters) > 0:
+        logger.info(f"   ✓ Created {len(clusters)} accident clusters")
+        logger.info(f"   ✓ Identified {df['is_hotspot'].sum():,} accidents in hotspots")
+    else:
+        logger.info("   ✓ No clusters formed")
+    
+    sweep = []
+    for (eps_km, min_samples), setting_labels in zip(settings[1:], labels[1:]):
+        variant = summarize_clusters(valid_coords.assign(cluster_id=setting_labels))
+        variant.insert(0, 'eps_km', eps_km)
+        variant.insert(1, 'min_samples', min_samples)
+        sweep.append(variant)
+        logger.info(f"   ✓ Sweep eps={eps_km}km, min_samples={min_samples}: {len(variant)} clusters, "
+                    f"{(setting_labels >= 0).sum():,} accidents in hotspots")
+    
+    return df, clusters, pd.concat(sweep, ignore_index=True) if sweep else pd.DataFrame()
+
+
+def summarize_clusters(valid_coords: pd.DataFrame) -> pd.DataFrame:
+    clustered = valid_coords[valid_coords['cluster_id'] >= 0]
+    clusters = clustered.groupby('cluster_id').agg({
         'id': 'count',
         'latitude': 'mean',
         'longitude': 'mean',
         'mortos': 'sum',
         'feridos': 'sum',
-        'severity_score': 'mean',
-        'hour': lambda x: x.mode()[0] if len(x.mode()) > 0 else x.mean(),
-        'day_of_week': lambda x: x.mode()[0] if len(x.mode()) > 0 else x.mean(),
-        'causa_acidente': lambda x: x.mode()[0] if len(x.mode()) > 0 else 'Vários'
-    }).reset_index()
+        'severity_score': 'mean'
+    }).join(grouped_mode(
+        clustered, 'cluster_id', ['hour', 'day_of_week', 'causa_acidente'], {'causa_acidente': 'Vários'}
+    )).reset_index()
     
     clusters.columns = [
         'cluster_id', 'accident_count', 'center_latitude', 'center_longitude',
@@ -80,26 +107,8 @@ def create_geographic_clusters(df: pd.DataFrame) -> tuple:
         'predominant_day', 'predominant_cause'
     ]
     
-    def calculate_cluster_radius(cluster_id):
-        cluster_points = valid_coords[valid_coords['cluster_id'] == cluster_id]
-        if len(cluster_points) == 0:
-            return 0
-        
-        center = clusters[clusters['cluster_id'] == cluster_id][['center_latitude', 'center_longitude']].values[0]
-        
-        distances = []
-        for idx, row in cluster_points.iterrows():
-            dist = calculate_distance_km(
-                center[0], center[1],
-                row['latitude'], row['longitude']
-            )
-            distances.append(dist)
-        
-        return max(distances) if distances else 0
-    
     if len(clusters) > 0:
-        logger.info(f"   Calculating cluster radii...")
-        clusters['radius_km'] = clusters['cluster_id'].apply(calculate_cluster_radius)
+        clusters = add_cluster_distance_stats(clusters, valid_coords)
         
         clusters['density_score'] = clusters['accident_count'] / (clusters['radius_km']**2 + 1)
         
@@ -110,13 +119,27 @@ def create_geographic_clusters(df: pd.DataFrame) -> tuple:
         )
         
         clusters['heat_intensity'] = clusters['density_score'] / clusters['density_score'].max()
-        
-        logger.info(f"   ✓ Created {len(clusters)} accident clusters")
-        logger.info(f"   ✓ Identified {df['is_hotspot'].sum():,} accidents in hotspots")
-    else:
-        logger.info("   ✓ No clusters formed")
     
-    return df, clusters
+    return clusters
+
+
+def add_cluster_distance_stats(clusters: pd.DataFrame, valid_coords: pd.DataFrame) -> pd.DataFrame:
+    points = valid_coords[valid_coords['cluster_id'] >= 0]
+    centers = clusters.set_index('cluster_id')
+    
+    distances = pd.Series(calculate_distance_km(
+        points['cluster_id'].map(centers['center_latitude']).values,
+        points['cluster_id'].map(centers['center_longitude']).values,
+        points['latitude'].values,
+        points['longitude'].values
+    ), index=points.index)
+    
+    by_cluster = distances.groupby(points['cluster_id'].values)
+    clusters['radius_km'] = clusters['cluster_id'].map(by_cluster.max()).fillna(0)
+    clusters['mean_distance_km'] = clusters['cluster_id'].map(by_cluster.mean()).fillna(0)
+    clusters['p90_distance_km'] = clusters['cluster_id'].map(by_cluster.quantile(0.9)).fillna(0)
+    
+    return clusters
 
 
 def create_highway_segments(df: pd.DataFrame) -> pd.DataFrame:
@@ -128,20 +151,21 @@ def create_highway_segments(df: pd.DataFrame) -> pd.DataFrame:
     df['km_segment_end'] = df['km_segment_start'] + config.SEGMENT_LENGTH_KM
     df['segment_id'] = 'BR' + df['br'].astype(str) + '_km' + df['km_segment_start'].astype(int).astype(str)
     
-    segments = df.groupby(['br', 'km_segment_start', 'km_segment_end', 'segment_id']).agg({
+    segment_keys = ['br', 'km_segment_start', 'km_segment_end', 'segment_id']
+    segments = df.groupby(segment_keys, observed=True).agg({
         'id': 'count',
-        'uf': lambda x: x.mode()[0] if len(x.mode()) > 0 else x.iloc[0],
-        'municipio': lambda x: x.mode()[0] if len(x.mode()) > 0 else 'Vários',
         'mortos': 'sum',
         'feridos': 'sum',
         'latitude': 'mean',
         'longitude': 'mean',
         'severity_score': 'mean',
-        'causa_acidente': lambda x: x.mode()[0] if len(x.mode()) > 0 else 'Vários',
-        'tipo_acidente': lambda x: x.mode()[0] if len(x.mode()) > 0 else 'Vários',
-        'condicao_metereologica': lambda x: x.mode()[0] if len(x.mode()) > 0 else 'Vários',
         'hour': 'mean'
-    }).reset_index()
+    }).join(grouped_mode(
+        df, segment_keys, ['uf', 'municipio', 'causa_acidente', 'tipo_acidente', 'condicao_metereologica'],
+        {'municipio': 'Vários', 'causa_acidente': 'Vários', 'tipo_acidente': 'Vários',
+         'condicao_metereologica': 'Vários'}
+    ))[['id', 'uf', 'municipio', 'mortos', 'feridos', 'latitude', 'longitude', 'severity_score',
+        'causa_acidente', 'tipo_acidente', 'condicao_metereologica', 'hour']].reset_index()
     
     segments.columns = [
         'highway', 'km_start', 'km_end', 'segment_id', 'accident_count',
@@ -173,7 +197,7 @@ def create_highway_segments(df: pd.DataFrame) -> pd.DataFrame:
         'BR-' + segments['highway'].astype(str) +
         ' km ' + segments['km_start'].astype(int).astype(str) +
         '-' + segments['km_end'].astype(int).astype(str) +
-        ' (' + segments['state'] + ')'
+        ' (' + segments['state'].astype(str) + ')'
     )
     
     logger.info(f"   ✓ Created {len(segments):,} highway segments")
@@ -197,9 +221,10 @@ if __name__ == "__main__":
     df_clean = clean_data(df_raw)
     df_enriched = enrich_data(df_clean)
     df_risks = calculate_risks(df_enriched)
-    df_geo, clusters, segments = analyze_geography(df_risks)
+    df_geo, clusters, segments, sweep = analyze_geography(df_risks)
     
     print(f"\n✓ Geographic analysis complete")
     print(f"✓ Clusters: {len(clusters)}")
     print(f"✓ Segments: {len(segments)}")
+    print(f"✓ Sweep clusters: {len(sweep)}")
     print(f"✓ Hotspot accidents: {df_geo['is_hotspot'].sum():,}")
@@ -0,0 +1,160 @@
+import pandas as pd
+import numpy as np
+import logging
+from utils import config
+from utils.helpers import save_dataframe, load_dataframe, apply_dtype_plan
+from extract.extract_data import extract_data
+from transform.stream_data import (clean_chunk, enrich_chunk, init_stream_stats,
+                                   update_stream_stats, finalize_stream_stats)
+
+logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
+RISK_SCORE_COLUMNS = [
+    'hour_risk_score', 'day_risk_score', 'time_risk_score',
+    'highway_risk_score', 'state_risk_score', 'location_risk_score',
+    'weather_risk_score', 'road_risk_score', 'condition_risk_score',
+    'composite_risk_score', 'is_high_risk'
+]
+
+
+def run_incremental(source=None) -> tuple:
+    logger.info("="*80)
+    logger.info("INCREMENTAL PHASE - Processing new, changed and removed records")
+    logger.info("="*80)
+    
+    config.INCREMENTAL_DIR.mkdir(parents=True, exist_ok=True)
+    
+    logger.info("\n1. Loading raw data...")
+    raw = extract_data(source)
+    row_hashes = hash_raw_rows(raw)
+    latest = ~row_hashes['row_key'].duplicated(keep='last').values
+    raw, row_hashes = raw[latest], row_hashes[latest].reset_index(drop=True)
+    
+    logger.info("\n2. Detecting new, changed and removed records...")
+    state, previous_hashes, stats = load_incremental_state()
+    changed_keys, new_keys, removed_keys = detect_changed_keys(row_hashes, previous_hashes)
+    
+    delta_keys = changed_keys.union(new_keys)
+    stale_keys = changed_keys.union(removed_keys)
+    logger.info(f"   ✓ {len(new_keys):,} new, {len(changed_keys):,} changed, {len(removed_keys):,} removed, "
+                f"{len(raw) - len(delta_keys):,} unchanged records")
+    
+    logger.info("\n3. Cleaning and enriching delta...")
+    in_delta = row_hashes['row_key'].isin(delta_keys).values
+    delta = raw[in_delta].assign(row_key=row_hashes.loc[in_delta, 'row_key'].values)
+    del raw
+    
+    if len(delta) > 0:
+        delta = enrich_chunk(clean_chunk(delta))
+    
+    logger.info("\n4. Updating group statistics from partial sums...")
+    if state is not None and len(stale_keys) > 0:
+        replaced = state[state['row_key'].isin(stale_keys)]
+        update_stream_stats(stats, replaced, sign=-1)
+        state = state[~state['row_key'].isin(stale_keys)]
+    
+    if len(delta) > 0:
+        update_stream_stats(stats, delta)
+    
+    frames = [frame for frame in [state, delta] if frame is not None and len(frame) > 0]
+    if not frames:
+        raise ValueError(f"No records found in {source or config.RAW_FILE}")
+    df = apply_dtype_plan(pd.concat(frames, ignore_index=True))
+    
+    # Put the rows back in raw file order, so order-dependent steps such as
+    # cluster numbering match a full run
+    positions = pd.Series(np.arange(len(row_hashes)), index=row_hashes['row_key'])
+    df = df.iloc[np.argsort(df['row_key'].map(positions).to_numpy(), kind='stable')].reset_index(drop=True)
+    
+    previous_hashes = pd.concat([
+        previous_hashes[~previous_hashes['row_key'].isin(delta_keys.union(removed_keys))],
+        row_hashes[row_hashes['row_key'].isin(delta_keys)]
+    ], ignore_index=True)
+    
+    save_incremental_state(df, previous_hashes, stats)
+    row_keys = df.pop('row_key')
+    
+    logger.info(f"\n✓ Incremental update complete: {len(df):,} records ({len(delta):,} reprocessed)")
+    
+    return df, finalize_stream_stats(stats), row_keys, delta_keys
+
+
+def hash_raw_rows(raw: pd.DataFrame) -> pd.DataFrame:
+    # Hash the values as text, with every number as float: the dtypes read_csv guesses depend
+    # on the file, and a single blank turns an int column into float
+    row_hashes = np.zeros(len(raw), dtype=np.uint64)
+    for col in sorted(raw.columns):
+        values = raw[col].astype('float64') if pd.api.types.is_numeric_dtype(raw[col]) else raw[col]
+        column_hashes = pd.util.hash_pandas_object(values.astype('string'), index=False).to_numpy()
+        row_hashes = row_hashes * np.uint64(1_000_003) ^ column_hashes
+    
+    ids = pd.to_numeric(raw['id'], errors='coerce')
+    
+    # Rows without a usable id are keyed by their content, as negative keys no real id can take
+    content_keys = -(row_hashes >> np.uint64(1)).astype(np.int64) - 1
+    return pd.DataFrame({
+        'row_key': np.where(ids.notna(), ids.fillna(0).astype(np.int64), content_keys),
+        'row_hash': row_hashes
+    })
+
+
+def detect_changed_keys(row_hashes: pd.DataFrame, previous_hashes: pd.DataFrame) -> tuple:
+    new_keys = set(row_hashes['row_key']) - set(previous_hashes['row_key'])
+    removed_keys = set(previous_hashes['row_key']) - set(row_hashes['row_key'])
+    
+    known = row_hashes.merge(previous_hashes, on='row_key', how='inner', suffixes=('', '_previous'))
+    changed_keys = set(known.loc[known['row_hash'] != known['row_hash_previous'], 'row_key'])
+    
+    return changed_keys, new_keys, removed_keys
+
+
+def load_incremental_state() -> tuple:
+    state_file = config.INCREMENTAL_DIR / "enriched_state.parquet"
+    hashes_file = config.INCREMENTAL_DIR / "row_hashes.parquet"
+    stats_file = config.INCREMENTAL_DIR / "group_stats.pkl"
+    
+    if not (state_file.exists() and hashes_file.exists() and stats_file.exists()):
+        logger.info("   No previous incremental state found - processing all records")
+        return None, pd.DataFrame({'row_key': pd.Series(dtype='int64'), 'row_hash': pd.Series(dtype='uint64')}), init_stream_stats()
+    
+    state = load_dataframe(state_file, "previous enriched state")
+    previous_hashes = load_dataframe(hashes_file, "previous row hashes")
+    stats = pd.read_pickle(stats_file)
+    
+    return state, previous_hashes, stats
+
+
+def save_incremental_state(df: pd.DataFrame, row_hashes: pd.DataFrame, stats: dict):
+    save_dataframe(df, config.INCREMENTAL_DIR / "enriched_state.parquet", "enriched state")
+    save_dataframe(row_hashes, config.INCREMENTAL_DIR / "row_hashes.parquet", "row hashes")
+    pd.to_pickle(stats, config.INCREMENTAL_DIR / "group_stats.pkl")
+
+
+def find_moved_rows(df: pd.DataFrame, row_keys: pd.Series, delta_keys: set) -> pd.DataFrame:
+    scores_file = config.INCREMENTAL_DIR / "risk_scores.parquet"
+    score_columns = [col for col in RISK_SCORE_COLUMNS if col in df.columns]
+    current = df[['id'] + score_columns].assign(row_key=row_keys.reindex(df.index).to_numpy())
+    
+    if scores_file.exists():
+        previous = load_dataframe(scores_file, "previous risk scores").drop(columns='id')
+        merged = current.merge(previous, on='row_key', how='left', suffixes=('', '_previous'))
+        
+        moved = np.zeros(len(merged), dtype=bool)
+        for col in score_columns:
+            previous_col = f"{col}_previous"
+            if previous_col not in merged.columns:
+                moved[:] = True
+                break
+            moved |= ~np.isclose(merged[col], merged[previous_col],
+                                 rtol=0, atol=config.INCREMENTAL_SCORE_TOLERANCE, equal_nan=True)
+        
+        moved |= merged['row_key'].isin(delta_keys).values
+        moved_rows = df[moved]
+    else:
+        moved_rows = df
+    
+    save_dataframe(current, scores_file, "risk scores")
+    logger.info(f"   ✓ {len(moved_rows):,} records with new or moved risk scores")
+    
+    return moved_rows
@@ -0,0 +1,162 @@
+import pandas as pd
+import numpy as np
+import logging
+from utils import config
+from utils.helpers import save_dataframe, get_part_file, load_part_files, apply_dtype_plan
+from extract.extract_data import iter_raw_chunks
+from transform.clean_data import (convert_numeric_fields, parse_datetime_fields,
+                                  standardize_text_fields, handle_missing_values)
+from transform.enrich_data import (add_temporal_dimensions, add_geographic_categories,
+                                   add_accident_characteristics, add_risk_flags,
+                                   add_map_visualization_fields, add_severity_scores)
+
+logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
+STREAM_STAT_KEYS = ['hour', 'day_of_week', 'uf', 'br', 'condicao_metereologica', 'tipo_pista']
+
+
+def stream_data(chunksize: int = None, source=None) -> tuple:
+    logger.info("="*80)
+    logger.info("STREAMING PHASE - Extract → Clean → Enrich in chunks")
+    logger.info("="*80)
+    
+    for staging_file in [config.CLEANED_FILE, config.ENRICHED_FILE]:
+        for stale_file in config.STAGING_DIR.glob(f"{staging_file.stem}*"):
+            stale_file.unlink()
+    
+    stats = init_stream_stats()
+    dtypes = {}
+    
+    # CSV does not round-trip dtypes, so the parts read back below are always columnar
+    parts_file = config.ENRICHED_FILE
+    if parts_file.suffix == '.csv':
+        parts_file = parts_file.with_suffix('.parquet')
+    
+    # Each enriched chunk goes to staging and is dropped before the next one is
+    # read; the full frame is only assembled once, from the staged parts
+    for chunk_number, chunk in enumerate(stream_enriched_chunks(chunksize, source), start=1):
+        update_stream_stats(stats, chunk)
+        update_chunk_dtypes(dtypes, chunk)
+        save_staging_chunk(chunk, config.ENRICHED_FILE, chunk_number, "enriched chunk")
+        if parts_file != config.ENRICHED_FILE:
+            save_staging_chunk(chunk, parts_file, chunk_number, "enriched chunk")
+        del chunk
+    
+    if stats['chunks'] == 0:
+        raise ValueError(f"No records found in {source or config.RAW_FILE}")
+    
+    df = load_part_files(parts_file, "enriched data")
+    df = apply_dtype_plan(restore_chunk_dtypes(df, dtypes))
+    group_stats = finalize_stream_stats(stats)
+    
+    logger.info(f"\n✓ Streaming complete: {stats['rows']:,} records in {stats['chunks']} chunks, {df.shape[1]} columns")
+    
+    return df, group_stats
+
+
+def stream_enriched_chunks(chunksize: int = None, source=None):
+    for chunk_number, raw_chunk in enumerate(iter_raw_chunks(chunksize, source), start=1):
+        chunk = clean_chunk(raw_chunk)
+        save_staging_chunk(chunk, config.CLEANED_FILE, chunk_number, "cleaned chunk")
+        yield enrich_chunk(chunk)
+
+
+def save_staging_chunk(chunk: pd.DataFrame, filepath, chunk_number: int, description: str):
+    if filepath.suffix == '.csv':
+        save_dataframe(chunk, filepath, description, append=True)
+    else:
+        save_dataframe(chunk, get_part_file(filepath, chunk_number), description)
+
+
+def update_chunk_dtypes(dtypes: dict, chunk: pd.DataFrame):
+    # Same rule as pd.concat: a categorical survives only if every chunk has the same categories
+    for col in chunk.columns:
+        dtype = chunk[col].dtype
+        if col not in dtypes:
+            dtypes[col] = dtype
+        elif dtypes[col] != dtype and pd.CategoricalDtype in (type(dtype), type(dtypes[col])):
+            dtypes[col] = np.dtype(object)
+
+
+def restore_chunk_dtypes(df: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    # The parquet round trip unifies categories in order of appearance and as str;
+    # put back the categories (or plain objects) the chunks themselves had
+    for col, dtype in dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype) or isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(dtype)
+    return df
+
+
+def clean_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    df = convert_numeric_fields(df)
+    df = parse_datetime_fields(df)
+    df = standardize_text_fields(df)
+    df = handle_missing_values(df)
+    return apply_dtype_plan(df)
+
+
+def enrich_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    df = add_temporal_dimensions(df)
+    df = add_geographic_categories(df)
+    df = add_accident_characteristics(df)
+    df = add_risk_flags(df)
+    df = add_map_visualization_fields(df)
+    df = add_severity_scores(df)
+    return apply_dtype_plan(df)
+
+
+def init_stream_stats() -> dict:
+    return {
+        'rows': 0,
+        'chunks': 0,
+        'groups': {},
+        'highway_km': None
+    }
+
+
+def update_stream_stats(stats: dict, chunk: pd.DataFrame, sign: int = 1):
+    stats['rows'] += sign * len(chunk)
+    stats['chunks'] += 1
+    
+    for key in STREAM_STAT_KEYS:
+        if key not in chunk.columns:
+            continue
+        
+        partial = chunk.groupby(key, observed=True).agg(
+            accidents=('id', 'count'),
+            mortos=('mortos', 'sum'),
+            feridos=('feridos', 'sum')
+        )
+        stats['groups'][key] = merge_partial_stats(stats['groups'].get(key), partial * sign)
+    
+    if 'br' in chunk.columns and 'km' in chunk.columns:
+        pairs = chunk.groupby(['br', 'km']).size().to_frame('rows')
+        stats['highway_km'] = merge_partial_stats(stats['highway_km'], pairs * sign)
+
+
+def merge_partial_stats(current: pd.DataFrame, partial: pd.DataFrame) -> pd.DataFrame:
+    if current is None:
+        return partial[partial.iloc[:, 0] > 0]
+    
+    merged = pd.concat([current, partial]).groupby(level=list(range(partial.index.nlevels))).sum()
+    
+    return merged[merged.iloc[:, 0] > 0]
+
+
+def finalize_stream_stats(stats: dict) -> dict:
+    group_stats = {key: partial.copy() for key, partial in stats['groups'].items()}
+    
+    if 'br' in group_stats and stats['highway_km'] is not None:
+        km_coverage = stats['highway_km'].reset_index().groupby('br')['km'].nunique()
+        group_stats['br']['km_coverage'] = km_coverage.reindex(group_stats['br'].index).fillna(0).astype(int)
+    
+    return group_stats
+
+
+if __name__ == "__main__":
+    df, group_stats = stream_data()
+    
+    print(f"\n✓ Streamed data shape: {df.shape}")
+    for key, partial in group_stats.items():
+        print(f"   - {key}: {len(partial)} groups")
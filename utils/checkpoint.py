@@ -0,0 +1,94 @@
+import pandas as pd
+import hashlib
+import json
+import logging
+from utils import config
+
+logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
+
+class CheckpointNotFoundError(FileNotFoundError):
+    def __init__(self, number: int, name: str, key: str):
+        super().__init__(f"No valid checkpoint for stage {number} ({name}) with key {key}")
+        self.number = number
+
+
+def fingerprint_files(filepaths: list) -> str:
+    digest = hashlib.sha256()
+    for filepath in sorted(filepaths):
+        stat = filepath.stat()
+        digest.update(f"{filepath.resolve()}|{stat.st_size}|{stat.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def fingerprint_code(source_files: list) -> str:
+    digest = hashlib.sha256()
+    for source_file in source_files:
+        digest.update((config.BASE_DIR / source_file).read_bytes())
+    return digest.hexdigest()
+
+
+def fingerprint_config(config_keys: list) -> str:
+    values = {key: getattr(config, key, None) for key in config_keys}
+    return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def build_stage_keys(input_fingerprint: str, stages: list) -> dict:
+    stage_keys = {}
+    previous_key = input_fingerprint
+    
+    for number, stage in enumerate(stages, start=1):
+        digest = hashlib.sha256()
+        digest.update(previous_key.encode('utf-8'))
+        digest.update(fingerprint_config(stage['config_keys']).encode('utf-8'))
+        digest.update(fingerprint_code(stage['source_files']).encode('utf-8'))
+        stage_keys[number] = digest.hexdigest()[:16]
+        previous_key = stage_keys[number]
+    
+    return stage_keys
+
+
+def get_checkpoint_file(number: int, name: str, key: str):
+    return config.CHECKPOINT_DIR / f"{number:02d}_{name}_{key}.pkl"
+
+
+def has_checkpoint(number: int, name: str, key: str) -> bool:
+    return get_checkpoint_file(number, name, key).exists()
+
+
+def save_checkpoint(result, number: int, name: str, key: str):
+    if not config.CHECKPOINT_ENABLED:
+        return
+    
+    config.CHECKPOINT_DIR.mkdir(parents=True, exist_ok=True)
+    
+    for stale_file in config.CHECKPOINT_DIR.glob(f"{number:02d}_{name}_*.pkl"):
+        stale_file.unlink()
+    
+    checkpoint_file = get_checkpoint_file(number, name, key)
+    pd.to_pickle(result, checkpoint_file)
+    
+    size_mb = checkpoint_file.stat().st_size / (1024 * 1024)
+    logger.info(f"✓ Saved checkpoint: {checkpoint_file.name} ({size_mb:.2f} MB)")
+
+
+def load_checkpoint(number: int, name: str, key: str):
+    checkpoint_file = get_checkpoint_file(number, name, key)
+    
+    if not checkpoint_file.exists():
+        raise CheckpointNotFoundError(number, name, key)
+    
+    result = pd.read_pickle(checkpoint_file)
+    logger.info(f"✓ Loaded checkpoint: {checkpoint_file.name}")
+    
+    return result
+
+
+def find_resume_stage(stages: list, stage_keys: dict) -> int:
+    for number in range(len(stages), 0, -1):
+        stage = stages[number - 1]
+        needed = stage.get('resume_checkpoints', [number])
+        if stage['cacheable'] and all(has_checkpoint(n, stages[n - 1]['name'], stage_keys[n]) for n in needed):
+            return number + 1
+    return 1
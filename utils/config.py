@@ -7,9 +7,22 @@ STAGING_DIR = DATA_DIR / "staging"
 FINAL_DIR = DATA_DIR / "final"
 
 RAW_FILE = RAW_DIR / "raw.csv"
+RAW_FILE_PATTERN = "*.csv"
+EXTRACT_WORKERS = None
 
-CLEANED_FILE = STAGING_DIR / "cleaned_data.csv"
-ENRICHED_FILE = STAGING_DIR / "enriched_data.csv"
+STAGING_FORMAT = 'parquet'
+PARQUET_COMPRESSION = 'snappy'
+
+CLEANED_FILE = STAGING_DIR / f"cleaned_data.{STAGING_FORMAT}"
+ENRICHED_FILE = STAGING_DIR / f"enriched_data.{STAGING_FORMAT}"
+
+CHECKPOINT_ENABLED = True
+CHECKPOINT_DIR = STAGING_DIR / "checkpoints"
+
+INCREMENTAL_DIR = STAGING_DIR / "incremental"
+INCREMENTAL_SCORE_TOLERANCE = 1e-6
+
+CUBE_DIR = FINAL_DIR / "cube"
 
 OUTPUT_FILES = {
     'detailed': FINAL_DIR / "accidents_detailed.csv",
@@ -22,21 +35,52 @@ OUTPUT_FILES = {
     'heatmap_clusters': FINAL_DIR / "accident_heatmap_clusters.csv",
     'daily_calendar': FINAL_DIR / "daily_risk_calendar.csv",
     'worst_answers': FINAL_DIR / "worst_answers.csv",
+    'detailed_changes': FINAL_DIR / "accidents_detailed_changes.csv",
 }
 
+STREAMING_MODE = False
+STREAM_CHUNK_SIZE = 250_000
+
 ENCODING = 'latin-1'
 CSV_SEPARATOR = ';'
+DECIMAL_SEPARATOR = ','
+RAW_DTYPES = {
+    'data_inversa': 'str', 'dia_semana': 'str', 'horario': 'str', 'uf': 'str',
+    'municipio': 'str', 'causa_acidente': 'str', 'tipo_acidente': 'str',
+    'classificacao_acidente': 'str', 'fase_dia': 'str', 'sentido_via': 'str',
+    'condicao_metereologica': 'str', 'tipo_pista': 'str', 'tracado_via': 'str',
+    'uso_solo': 'str', 'regional': 'str', 'delegacia': 'str', 'uop': 'str'
+}
 OUTPUT_ENCODING = 'utf-8'
 OUTPUT_SEPARATOR = ','
+EXPORT_POPUP_FIELDS = True
 
 CLUSTER_EPSILON_KM = 5
 CLUSTER_MIN_SAMPLES = 10
+CLUSTER_ENGINE = 'grid'
+CLUSTER_COLLAPSE_DUPLICATES = True
+CLUSTER_COORDINATE_DECIMALS = None
+CLUSTER_SWEEP = []
+CLUSTER_WORKERS = None
+CLUSTER_PARTITION = 'grid'
+CLUSTER_PARTITION_KM = 250
 
 SEGMENT_LENGTH_KM = 10
 
 HIGH_RISK_PERCENTILE = 80
 HOTSPOT_MIN_ACCIDENTS = 20
 
+CUBE_CUBOIDS = {
+    'time': ['month', 'month_name', 'day_of_month', 'day_of_week', 'day_of_week_name_pt', 'hour'],
+    'location': ['uf', 'br', 'municipio', 'condicao_metereologica'],
+    'location_cause': ['uf', 'br', 'municipio', 'causa_acidente'],
+    'location_type': ['uf', 'br', 'municipio', 'tipo_acidente'],
+    'highway_km': ['br', 'km']
+}
+
+DENSE_GROUPBY = True
+DENSE_GROUPBY_MAX_CELLS = 1_000_000
+
 DATE_FORMAT = '%Y-%m-%d'
 TIME_FORMAT = '%H:%M:%S'
 
@@ -54,6 +98,14 @@ SEVERITY_COLORS = {
     'Sem Vítimas': '#D3D3D3'
 }
 
+SEVERITY_WEIGHTS = {
+    'mortos': 10,
+    'feridos_graves': 3,
+    'feridos_leves': 1
+}
+SEVERITY_SCALE = 10
+SEVERITY_MAX_SCORE = 100.0
+
 TIME_PERIODS = {
     'madrugada': (0, 6),
     'manha': (6, 12),
@@ -79,5 +131,54 @@ ENVIRONMENTAL_CAUSES = [
     'vento', 'Curva acentuada', 'via'
 ]
 
+CAUSE_CLASSIFIER_DEBUG = False
+
+CHARACTERISTIC_FLAGS = {
+    'weather_clear': {'condicao_metereologica': 'Claro|Sol'},
+    'weather_rain': {'condicao_metereologica': 'Chuva|Garoa'},
+    'weather_fog': {'condicao_metereologica': 'Nevoeiro|Neblina'},
+    'has_curve': {'tracado_via': 'Curva'},
+    'has_slope': {'tracado_via': 'Aclive|Declive'},
+    'has_intersection': {'tracado_via': 'Interse'}
+}
+
+RISK_FLAGS = {
+    'alcohol_involved': {'causa_acidente': 'lcool'},
+    'driver_asleep': {'causa_acidente': 'Dormindo'},
+    'speed_related': {'causa_acidente': 'Velocidade'},
+    'mechanical_failure': {'causa_acidente': 'mec.+nica|el.+trica|pneu|freio'},
+    'weather_related': {'causa_acidente': 'Chuva|Pista|gua|neblina'},
+    'is_night': {'fase_dia': 'Noite'},
+    'poor_visibility': {'condicao_metereologica': 'Nevoeiro|Neblina|Chuva', 'fase_dia': 'Noite'}
+}
+
+DTYPE_PLAN = {
+    'int16': [
+        'pessoas', 'mortos', 'feridos_leves', 'feridos_graves', 'ilesos',
+        'ignorados', 'feridos', 'veiculos'
+    ],
+    'int8': [
+        'is_weekend', 'is_rush_hour', 'is_business_hours', 'is_urban',
+        'weather_clear', 'weather_rain', 'weather_fog', 'has_curve', 'has_slope',
+        'has_intersection', 'alcohol_involved', 'driver_asleep', 'speed_related',
+        'mechanical_failure', 'weather_related', 'is_night', 'poor_visibility',
+        'fatality_probability', 'is_high_risk', 'is_hotspot'
+    ],
+    'int32': ['cluster_id'],
+    'category': [
+        'data_inversa', 'horario', 'dia_semana', 'uf', 'municipio', 'causa_acidente',
+        'tipo_acidente', 'classificacao_acidente', 'fase_dia', 'sentido_via',
+        'condicao_metereologica', 'tipo_pista', 'tracado_via', 'uso_solo', 'regional',
+        'delegacia', 'uop', 'month_name', 'day_of_week_name', 'day_of_week_name_pt',
+        'time_period', 'time_bucket_4h', 'state_region', 'city_normalized',
+        'cause_category', 'marker_color', 'marker_size', 'segment_id'
+    ]
+}
+
+MEMORY_REPORT = True
+
+TRACE_ENABLED = True
+TRACE_MEMORY = False
+
 LOG_LEVEL = 'INFO'
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
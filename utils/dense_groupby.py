@@ -0,0 +1,194 @@
+import pandas as pd
+import numpy as np
+import logging
+from utils import config
+
+logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
+
+def encode_dense_keys(df: pd.DataFrame, keys, dropna: bool = True) -> dict:
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    if not config.DENSE_GROUPBY or len(df) == 0:
+        return None
+    
+    codes = None
+    missing = None
+    levels = []
+    size = 1
+    
+    for key in keys:
+        level = encode_dense_level(df[key], dropna)
+        if level is None:
+            return None
+        
+        size *= level['size']
+        if size > config.DENSE_GROUPBY_MAX_CELLS:
+            return None
+        
+        if level['missing'] is not None:
+            missing = level['missing'] if missing is None else missing | level['missing']
+        codes = level['codes'] if codes is None else codes * level['size'] + level['codes']
+        levels.append(level)
+    
+    valid = None if missing is None else ~missing
+    if valid is not None:
+        codes = codes[valid]
+    
+    rows = np.bincount(codes, minlength=size)
+    present = np.flatnonzero(rows)
+    
+    positions = np.unravel_index(present, [level['size'] for level in levels])
+    values = [decode_dense_level(level, position) for level, position in zip(levels, positions)]
+    if len(keys) == 1:
+        index = pd.Index(values[0], name=keys[0])
+    else:
+        index = pd.MultiIndex.from_arrays(values, names=keys)
+    
+    return {
+        'codes': codes,
+        'valid': valid,
+        'size': size,
+        'rows': rows[present],
+        'present': present,
+        'index': index
+    }
+
+
+def encode_dense_level(series: pd.Series, dropna: bool) -> dict:
+    dtype = series.dtype
+    
+    if isinstance(dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy().astype(np.int64)
+        level = {'dtype': dtype, 'offset': 0, 'size': len(dtype.categories)}
+    elif pd.api.types.is_integer_dtype(dtype) and isinstance(dtype, np.dtype):
+        values = series.to_numpy()
+        low, high = int(values.min()), int(values.max())
+        codes = values.astype(np.int64) - low
+        level = {'dtype': dtype, 'offset': low, 'size': high - low + 1}
+    elif pd.api.types.is_float_dtype(dtype) and isinstance(dtype, np.dtype):
+        values = series.to_numpy()
+        missing = np.isnan(values)
+        known = values[~missing]
+        if known.size == 0 or not np.isfinite(known).all() or not np.array_equal(known, np.floor(known)):
+            return None
+        low, high = int(known.min()), int(known.max())
+        codes = np.where(missing, -1, values - low).astype(np.int64)
+        level = {'dtype': dtype, 'offset': low, 'size': high - low + 1}
+    else:
+        return None
+    
+    if level['size'] > config.DENSE_GROUPBY_MAX_CELLS:
+        return None
+    
+    missing = codes < 0
+    level['missing'] = None
+    level['missing_level'] = False
+    if missing.any():
+        if dropna:
+            level['missing'] = missing
+            codes = np.maximum(codes, 0)
+        else:
+            codes[missing] = level['size']
+            level['size'] += 1
+            level['missing_level'] = True
+    
+    level['codes'] = codes
+    return level
+
+
+def decode_dense_level(level: dict, codes: np.ndarray):
+    missing = level['missing_level'] and codes == level['size'] - 1
+    
+    if isinstance(level['dtype'], pd.CategoricalDtype):
+        return pd.Categorical.from_codes(np.where(missing, -1, codes), dtype=level['dtype'])
+    
+    values = codes + level['offset']
+    if pd.api.types.is_float_dtype(level['dtype']):
+        return np.where(missing, np.nan, values).astype(level['dtype'])
+    
+    return values.astype(level['dtype'])
+
+
+def dense_values(groups: dict, values) -> np.ndarray:
+    values = np.asarray(values)
+    return values[groups['valid']] if groups['valid'] is not None else values
+
+
+def dense_count(groups: dict, mask=None) -> np.ndarray:
+    if mask is None:
+        return groups['rows']
+    
+    mask = dense_values(groups, mask)
+    return np.bincount(groups['codes'][mask], minlength=groups['size'])[groups['present']]
+
+
+def dense_sum(groups: dict, values) -> np.ndarray:
+    values = dense_values(groups, values)
+    if values.dtype.kind not in 'biu':
+        return None
+    
+    # bincount accumulates in float64, which is exact for integer totals below 2**53
+    sums = np.bincount(groups['codes'], weights=values, minlength=groups['size'])[groups['present']]
+    return sums.astype(np.int64)
+
+
+SUM_DTYPES = {}
+
+
+def downcast_sum(sums: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    # Match the dtype pandas gives grouped integer sums, which depends on the pandas version
+    if dtype not in SUM_DTYPES:
+        SUM_DTYPES[dtype] = pd.Series(np.zeros(1, dtype=dtype)).groupby(np.zeros(1)).sum().dtype
+    target = SUM_DTYPES[dtype]
+    
+    if target != sums.dtype and target.kind in 'iu':
+        limits = np.iinfo(target)
+        if sums.size and (sums.min() < limits.min or sums.max() > limits.max):
+            return sums.astype(np.uint64 if target.kind == 'u' else np.int64)
+    return sums.astype(target)
+
+
+def dense_mean(groups: dict, values) -> np.ndarray:
+    sums = dense_sum(groups, values)
+    return None if sums is None else sums / groups['rows']
+
+
+def dense_rate(groups: dict, numerator, denominator=None, scale: float = 100) -> np.ndarray:
+    sums = dense_sum(groups, numerator)
+    totals = groups['rows'] if denominator is None else dense_sum(groups, denominator)
+    if sums is None or totals is None:
+        return None
+    return sums / totals * scale
+
+
+def is_dense_measure(df: pd.DataFrame, col: str, func: str) -> bool:
+    dtype = df[col].dtype
+    if not isinstance(dtype, np.dtype) and func != 'size':
+        return False
+    return func in ('size', 'count') or (func in ('sum', 'mean') and dtype.kind in 'biu')
+
+
+def aggregate_groups(df: pd.DataFrame, keys, measures: dict, dropna: bool = True) -> pd.DataFrame:
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    
+    # Float sums and means stay on pandas: its grouped reductions use Kahan summation, and a
+    # plain bincount total can differ from them in the last bit
+    dense = all(is_dense_measure(df, col, func) for col, func in measures.values())
+    groups = encode_dense_keys(df, keys, dropna) if dense else None
+    if groups is None:
+        return df.groupby(keys, observed=True, dropna=dropna).agg(**measures)
+    
+    result = pd.DataFrame(index=groups['index'])
+    for name, (col, func) in measures.items():
+        values = df[col].to_numpy()
+        if func == 'size':
+            result[name] = groups['rows']
+        elif func == 'count':
+            result[name] = dense_count(groups, None if values.dtype.kind in 'biu' else df[col].notna().to_numpy())
+        elif func == 'mean':
+            result[name] = dense_mean(groups, values)
+        else:
+            result[name] = downcast_sum(dense_sum(groups, values), values.dtype)
+    
+    return result
@@ -0,0 +1,82 @@
+import pandas as pd
+import logging
+from utils import config
+from utils.dense_groupby import aggregate_groups
+
+logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
+GROUP_STAT_MEASURES = {
+    'id': ['count', 'size'],
+    'mortos': ['sum'],
+    'feridos': ['sum']
+}
+
+SEED_STAT_COLUMNS = {
+    'accidents': ('id', 'count'),
+    'mortos': ('mortos', 'sum'),
+    'feridos': ('feridos', 'sum'),
+    'km_coverage': ('km', 'nunique')
+}
+
+
+def create_group_store(df: pd.DataFrame, seed: dict = None) -> dict:
+    seeded = {}
+    for key, partial in (seed or {}).items():
+        columns = [col for col in partial.columns if col in SEED_STAT_COLUMNS]
+        seeded[(key,)] = partial[columns].rename(columns=SEED_STAT_COLUMNS)
+    
+    return {'df': df, 'stats': {}, 'seeded': seeded}
+
+
+def lookup_group_stats(store: dict, keys, agg: dict) -> pd.DataFrame:
+    keys = tuple([keys] if isinstance(keys, str) else keys)
+    wanted = [(col, func) for col, func in agg.items()]
+    
+    cached = store['stats'].get(keys)
+    if cached is None or not set(wanted) <= set(cached.columns):
+        seeded = store['seeded'].get(keys)
+        if cached is None and seeded is not None and set(wanted) <= set(seeded.columns):
+            cached = seeded
+        else:
+            cached = compute_group_stats(store, keys, wanted)
+    
+    stats = cached[wanted].copy()
+    stats.columns = [col for col, _ in wanted]
+    return stats
+
+
+def compute_group_stats(store: dict, keys: tuple, wanted: list) -> pd.DataFrame:
+    df = store['df']
+    cached = store['stats'].get(keys)
+    done = set() if cached is None else set(cached.columns)
+    
+    measures = {}
+    for col, funcs in list(GROUP_STAT_MEASURES.items()) + [(col, [func]) for col, func in wanted]:
+        if col not in df.columns:
+            continue
+        for func in funcs:
+            if (col, func) not in done and func not in measures.get(col, []):
+                measures.setdefault(col, []).append(func)
+    
+    named = {f'{col}_{func}': (col, func) for col, funcs in measures.items() for func in funcs}
+    stats = aggregate_groups(df, list(keys), named)
+    stats.columns = pd.MultiIndex.from_tuples(list(named.values()))
+    
+    if cached is not None:
+        stats = pd.concat([cached, stats], axis=1)
+    
+    store['stats'][keys] = stats
+    return stats
+
+
+def invalidate_group_stats(store: dict, columns: list):
+    for cache in [store['stats'], store['seeded']]:
+        for keys in list(cache):
+            if any(key in columns for key in keys):
+                del cache[keys]
+                continue
+            
+            stale = [stat for stat in cache[keys].columns if stat[0] in columns]
+            if stale:
+                cache[keys] = cache[keys].drop(columns=stale)
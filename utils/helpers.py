@@ -1,13 +1,56 @@
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pyarrow import feather
 import logging
+import re
+import string
+import sys
 from datetime import datetime
+from functools import lru_cache
 from typing import List, Dict, Any, Tuple
 from utils import config
 
+try:
+    import resource
+except ImportError:
+    resource = None
+
 logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
 logger = logging.getLogger(__name__)
 
+_DATETIME_CACHE = {}
+
+_CAUSE_TABLES = {}
+
+POPUP_FIELDS = ['br', 'km', 'municipio', 'uf', 'data_inversa', 'horario',
+                'tipo_acidente', 'mortos', 'feridos', 'causa_acidente', 'condicao_metereologica']
+
+POPUP_HTML_TEMPLATE = """
+    <div style="width:280px; font-family: Arial, sans-serif;">
+        <h3 style="margin:0; color:#333;">BR-{br} km {km}</h3>
+        <p style="margin:5px 0; color:#666;"><strong>{municipio}, {uf}</strong></p>
+        <p style="margin:5px 0; color:#999; font-size:12px;">{data_inversa} {horario}</p>
+        <hr style="border:none; border-top:1px solid #eee; margin:8px 0;">
+        <p style="margin:5px 0;"><strong>Tipo:</strong> {tipo_acidente}</p>
+        <p style="margin:5px 0;">
+            <strong>Mortos:</strong> {mortos} {deaths_emoji} | 
+            <strong>Feridos:</strong> {feridos}
+        </p>
+        <p style="margin:5px 0; font-size:12px; color:#666;">
+            <strong>Causa:</strong> {causa_acidente}...
+        </p>
+        <p style="margin:5px 0; font-size:12px; color:#666;">
+            <strong>Clima:</strong> {condicao_metereologica}
+        </p>
+    </div>
+    """
+
+TOOLTIP_FIELDS = ['br', 'km', 'mortos', 'feridos']
+
+TOOLTIP_TEMPLATE = "BR-{br} km {km} | {victims}"
+
 
 def convert_decimal_comma_to_dot(value):
     if pd.isna(value):
@@ -20,6 +63,29 @@ def convert_decimal_comma_to_dot(value):
         return np.nan
 
 
+def convert_decimal_comma_series(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+    
+    try:
+        text = series.str.replace(',', '.', regex=False)
+    except AttributeError:
+        return pd.to_numeric(series, errors='coerce').astype(float)
+    
+    try:
+        parsed = text.astype(float)
+    except (ValueError, TypeError):
+        parsed = pd.to_numeric(text, errors='coerce')
+    parsed = parsed.fillna(pd.to_numeric(series.where(text.isna()), errors='coerce'))
+    
+    residual = text.notna() & parsed.isna()
+    if residual.any():
+        lookup = {value: convert_decimal_comma_to_dot(value) for value in series[residual].unique()}
+        parsed[residual] = series[residual].map(lookup)
+    
+    return parsed.astype(float)
+
+
 def get_brazilian_region(uf: str) -> str:
     for region, states in config.BRAZILIAN_REGIONS.items():
         if uf in states:
@@ -44,19 +110,70 @@ def is_rush_hour(hour: int) -> bool:
 def categorize_cause(cause: str) -> str:
     if pd.isna(cause):
         return 'unknown'
+    return classify_cause(cause)[0]
+
+
+def get_cause_keywords() -> tuple:
+    return (
+        ('human', tuple(config.HUMAN_CAUSES)),
+        ('mechanical', tuple(config.MECHANICAL_CAUSES)),
+        ('environmental', tuple(config.ENVIRONMENTAL_CAUSES))
+    )
+
+
+@lru_cache(maxsize=None)
+def compile_cause_classifier(cause_keywords: tuple) -> re.Pattern:
+    branches = [
+        f"(?=.*?(?P<{category}>{'|'.join(re.escape(keyword.lower()) for keyword in keywords)}))"
+        for category, keywords in cause_keywords if keywords
+    ]
+    return re.compile('^(?:' + '|'.join(branches) + ')', re.DOTALL) if branches else re.compile('(?!)')
+
+
+def classify_cause(cause: str) -> tuple:
+    classifier = compile_cause_classifier(get_cause_keywords())
+    table = _CAUSE_TABLES.setdefault(classifier, {})
     
-    cause_lower = cause.lower()
+    if cause not in table:
+        match = classifier.match(cause.lower())
+        table[cause] = (match.lastgroup, match.group(match.lastgroup)) if match else ('other', None)
     
-    if any(keyword.lower() in cause_lower for keyword in config.HUMAN_CAUSES):
-        return 'human'
+    return table[cause]
+
+
+def categorize_causes(series: pd.Series) -> pd.Series:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, uniques = pd.factorize(series)
     
-    if any(keyword.lower() in cause_lower for keyword in config.MECHANICAL_CAUSES):
-        return 'mechanical'
+    classified = [classify_cause(cause) for cause in uniques] + [('unknown', None)]
+    categories = np.array([category for category, _ in classified], dtype=object)
     
-    if any(keyword.lower() in cause_lower for keyword in config.ENVIRONMENTAL_CAUSES):
-        return 'environmental'
+    if config.CAUSE_CLASSIFIER_DEBUG:
+        log_cause_matches(classified, uniques, codes)
     
-    return 'other'
+    return pd.Series(categories[codes], index=series.index, name='cause_category')
+
+
+def log_cause_matches(classified: list, uniques, codes):
+    counts = np.bincount(codes + 1, minlength=len(classified))[1:]
+    
+    keyword_counts = {}
+    unmatched = []
+    for position, (category, keyword) in enumerate(classified[:-1]):
+        if keyword is None:
+            unmatched.append((uniques[position], counts[position]))
+        else:
+            keyword_counts[(category, keyword)] = keyword_counts.get((category, keyword), 0) + counts[position]
+    
+    logger.info("   Cause classifier matches (category / keyword / rows):")
+    for (category, keyword), rows in sorted(keyword_counts.items(), key=lambda item: -item[1]):
+        logger.info(f"      {category:<14} {keyword!r:<24} {rows:,}")
+    
+    logger.info(f"   Unmatched causes ('other'): {len(unmatched)} distinct values")
+    for cause, rows in sorted(unmatched, key=lambda item: -item[1])[:20]:
+        logger.info(f"      {cause!r:<60} {rows:,}")
 
 
 def get_marker_color(severity_class: str) -> str:
@@ -74,58 +191,64 @@ def get_marker_size(num_people: int) -> str:
         return 'xlarge'
 
 
-def calculate_severity_score(row: pd.Series) -> float:
-    try:
-        deaths = row['mortos']
-        serious = row['feridos_graves']
-        light = row['feridos_leves']
-        total = row['pessoas']
-        
-        if total == 0:
-            return 0.0
-        
-        weighted_sum = (deaths * 10) + (serious * 3) + (light * 1)
-        score = (weighted_sum / total) * 10
-        
-        return min(score, 100.0)
-    except:
-        return 0.0
+def calculate_severity_scores(df: pd.DataFrame) -> np.ndarray:
+    total = df['pessoas'].to_numpy(dtype=float)
+    
+    weighted_sum = np.zeros(len(df))
+    for col, weight in config.SEVERITY_WEIGHTS.items():
+        weighted_sum += df[col].to_numpy(dtype=float) * weight
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        score = np.minimum((weighted_sum / total) * config.SEVERITY_SCALE, config.SEVERITY_MAX_SCORE)
+    
+    return np.where(total == 0, 0.0, score)
 
 
-def create_popup_html(row: pd.Series) -> str:
-    deaths_emoji = '⚠️' if row['mortos'] > 0 else ''
+def render_template(template: str, fields: dict, index: pd.Index) -> pd.Series:
+    rendered = pd.Series('', index=index, dtype=object)
     
-    html = f"""
-    <div style="width:280px; font-family: Arial, sans-serif;">
-        <h3 style="margin:0; color:#333;">BR-{row['br']} km {row['km']}</h3>
-        <p style="margin:5px 0; color:#666;"><strong>{row['municipio']}, {row['uf']}</strong></p>
-        <p style="margin:5px 0; color:#999; font-size:12px;">{row['data_inversa']} {row['horario']}</p>
-        <hr style="border:none; border-top:1px solid #eee; margin:8px 0;">
-        <p style="margin:5px 0;"><strong>Tipo:</strong> {row['tipo_acidente']}</p>
-        <p style="margin:5px 0;">
-            <strong>Mortos:</strong> {row['mortos']} {deaths_emoji} | 
-            <strong>Feridos:</strong> {row['feridos']}
-        </p>
-        <p style="margin:5px 0; font-size:12px; color:#666;">
-            <strong>Causa:</strong> {row['causa_acidente'][:50]}...
-        </p>
-        <p style="margin:5px 0; font-size:12px; color:#666;">
-            <strong>Clima:</strong> {row['condicao_metereologica']}
-        </p>
-    </div>
-    """
-    return html.replace('\n', '').replace('  ', '')
+    for literal, name, _, _ in string.Formatter().parse(template):
+        if literal:
+            rendered = rendered + literal
+        if name is not None:
+            rendered = rendered + fields[name]
+    
+    return rendered
 
 
-def create_tooltip_text(row: pd.Series) -> str:
-    if row['mortos'] > 0:
-        victims = f"{row['mortos']} morte(s)"
-    elif row['feridos'] > 0:
-        victims = f"{row['feridos']} ferido(s)"
-    else:
-        victims = "sem vítimas"
+def create_popup_html(df: pd.DataFrame) -> pd.Series:
+    fields = {col: df[col].astype(str) for col in POPUP_FIELDS}
+    fields['causa_acidente'] = fields['causa_acidente'].str[:50]
+    fields['deaths_emoji'] = pd.Series(np.where(df['mortos'] > 0, '⚠️', ''), index=df.index)
     
-    return f"BR-{row['br']} km {row['km']} | {victims}"
+    html = render_template(POPUP_HTML_TEMPLATE, fields, df.index)
+    return html.str.replace('\n', '', regex=False).str.replace('  ', '', regex=False)
+
+
+def create_tooltip_text(df: pd.DataFrame) -> pd.Series:
+    fields = {col: df[col].astype(str) for col in TOOLTIP_FIELDS}
+    
+    victims = pd.Series('sem vítimas', index=df.index, dtype=object)
+    victims = victims.mask(df['feridos'] > 0, fields['feridos'] + ' ferido(s)')
+    fields['victims'] = victims.mask(df['mortos'] > 0, fields['mortos'] + ' morte(s)')
+    
+    return render_template(TOOLTIP_TEMPLATE, fields, df.index)
+
+
+def add_popup_fields(df: pd.DataFrame) -> pd.DataFrame:
+    if len(df) == 0:
+        return df
+    
+    position = df.columns.get_loc('marker_opacity') + 1 if 'marker_opacity' in df.columns else len(df.columns)
+    
+    if all(col in df.columns for col in TOOLTIP_FIELDS) and 'tooltip_text' not in df.columns:
+        df.insert(position, 'tooltip_text', create_tooltip_text(df))
+        position += 1
+    
+    if all(col in df.columns for col in POPUP_FIELDS) and 'popup_html' not in df.columns:
+        df.insert(position, 'popup_html', create_popup_html(df))
+    
+    return df
 
 
 def normalize_text(text: str) -> str:
@@ -134,6 +257,141 @@ def normalize_text(text: str) -> str:
     return ' '.join(str(text).strip().split())
 
 
+def normalize_text_series(series: pd.Series) -> pd.Series:
+    codes, uniques = pd.factorize(series)
+    
+    normalized = [normalize_text(value) for value in uniques]
+    if (codes == -1).any():
+        normalized.append(normalize_text(np.nan))
+        codes = np.where(codes == -1, len(normalized) - 1, codes)
+    
+    category_codes, categories = pd.factorize(pd.Index(normalized, dtype=object), sort=True)
+    
+    return pd.Series(
+        pd.Categorical.from_codes(category_codes[codes], categories=categories),
+        index=series.index,
+        name=series.name
+    )
+
+
+def parse_datetime_series(series: pd.Series, fmt: str) -> tuple:
+    codes, uniques = pd.factorize(series)
+    
+    cache = _DATETIME_CACHE.get(fmt)
+    missing = uniques if cache is None else uniques[~uniques.isin(cache.index)]
+    if len(missing) > 0:
+        parsed = pd.Series(pd.to_datetime(missing, format=fmt, errors='coerce'), index=missing)
+        cache = parsed if cache is None else pd.concat([cache, parsed])
+        _DATETIME_CACHE[fmt] = cache
+    
+    values = cache.reindex(uniques).reset_index(drop=True)
+    if (codes == -1).any():
+        values = pd.concat([values, pd.Series([pd.NaT], dtype=values.dtype)], ignore_index=True)
+        codes = np.where(codes == -1, len(values) - 1, codes)
+    
+    return codes, values
+
+
+def evaluate_text_flags(df: pd.DataFrame, registry: dict) -> pd.DataFrame:
+    flag_names = [name for name, sources in registry.items() if all(col in df.columns for col in sources)]
+    if len(flag_names) > 64:
+        raise ValueError(f"Flag registry supports at most 64 flags, got {len(flag_names)}")
+    
+    masks = np.zeros(len(df), dtype=np.uint64)
+    
+    source_columns = dict.fromkeys(col for name in flag_names for col in registry[name])
+    for col in source_columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            codes, uniques = df[col].cat.codes.to_numpy(), df[col].cat.categories
+        else:
+            codes, uniques = pd.factorize(df[col])
+        
+        lookup = np.zeros(len(uniques) + 1, dtype=np.uint64)
+        for bit, name in enumerate(flag_names):
+            if col not in registry[name]:
+                continue
+            pattern = re.compile(registry[name][col], re.IGNORECASE)
+            matches = np.array([bool(pattern.search(str(value))) for value in uniques] + [False])
+            lookup[matches] |= np.uint64(1 << bit)
+        
+        masks |= lookup[codes]
+    
+    return pd.DataFrame({
+        name: ((masks >> np.uint64(bit)) & np.uint64(1)).astype(np.int8)
+        for bit, name in enumerate(flag_names)
+    }, index=df.index)
+
+
+def grouped_top_values(df: pd.DataFrame, keys, column: str, k: int = 1, weights: str = None) -> pd.DataFrame:
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    
+    # size() comes back sorted by value inside each group, so a stable sort on count keeps ties in
+    # Series.mode() order (smallest value first)
+    grouped = df.groupby(keys + [column], observed=True)
+    counts = (grouped.size() if weights is None else grouped[weights].sum()).reset_index(name='count')
+    counts = counts.sort_values(keys + ['count'], ascending=[True] * len(keys) + [False], kind='stable')
+    
+    grouped = counts.groupby(keys, observed=True, sort=False)['count']
+    counts['share'] = counts['count'] / grouped.transform('sum')
+    counts['rank'] = grouped.cumcount() + 1
+    
+    return counts[counts['rank'] <= k].set_index(keys)[['rank', column, 'count', 'share']]
+
+
+def grouped_mode(df: pd.DataFrame, keys, columns: list, fallback=np.nan, weights: str = None) -> pd.DataFrame:
+    keys = [keys] if isinstance(keys, str) else list(keys)
+    groups = df.groupby(keys, observed=True).size().index
+    
+    modes = {}
+    for column in columns:
+        mode = grouped_top_values(df, keys, column, weights=weights)[column].reindex(groups)
+        value = fallback.get(column, np.nan) if isinstance(fallback, dict) else fallback
+        missing = mode.isna()
+        if missing.any() and not pd.isna(value):
+            mode = mode.astype(object).where(~missing, value)
+        modes[column] = mode
+    
+    return pd.DataFrame(modes, index=groups)
+
+
+def apply_dtype_plan(df: pd.DataFrame) -> pd.DataFrame:
+    for dtype, columns in config.DTYPE_PLAN.items():
+        for col in columns:
+            if col not in df.columns or df[col].dtype == dtype:
+                continue
+            
+            if dtype == 'category':
+                df[col] = df[col].astype('category')
+            elif pd.api.types.is_integer_dtype(df[col]) or pd.api.types.is_bool_dtype(df[col]):
+                limits = np.iinfo(dtype)
+                if df[col].empty or (df[col].min() >= limits.min and df[col].max() <= limits.max):
+                    df[col] = df[col].astype(dtype)
+    
+    return df
+
+
+def get_frame_memory_mb(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True).sum() / 1024**2
+
+
+def log_memory_usage(df: pd.DataFrame, label: str, memory_mb: float = None):
+    if not config.MEMORY_REPORT:
+        return
+    
+    if memory_mb is None:
+        memory_mb = get_frame_memory_mb(df)
+    logger.info(f"   Memory {label}: {memory_mb:,.2f} MB ({len(df):,} rows x {len(df.columns)} columns), "
+                f"peak RSS {get_peak_rss_mb():,.0f} MB")
+
+
+def get_peak_rss_mb() -> float:
+    if resource is None:
+        return float('nan')
+    
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024**2 if sys.platform == 'darwin' else peak / 1024
+
+
 def validate_coordinates(df: pd.DataFrame) -> pd.DataFrame:
     logger.info("Validating coordinates...")
     
@@ -185,9 +443,16 @@ def create_directory_structure():
         logger.info(f"Ensured directory exists: {directory}")
 
 
-def save_dataframe(df: pd.DataFrame, filepath: str, description: str = ""):
+def save_dataframe(df: pd.DataFrame, filepath: str, description: str = "", append: bool = False):
     try:
-        df.to_csv(filepath, index=False, encoding=config.OUTPUT_ENCODING, sep=config.OUTPUT_SEPARATOR)
+        if filepath.suffix == '.parquet':
+            df.to_parquet(filepath, index=False, engine='pyarrow', compression=config.PARQUET_COMPRESSION)
+        elif filepath.suffix == '.feather':
+            df.reset_index(drop=True).to_feather(filepath)
+        else:
+            write_header = not (append and filepath.exists())
+            df.to_csv(filepath, index=False, encoding=config.OUTPUT_ENCODING, sep=config.OUTPUT_SEPARATOR,
+                      mode='a' if append else 'w', header=write_header)
         size_mb = filepath.stat().st_size / (1024 * 1024)
         logger.info(f"✓ Saved {description}: {filepath.name} ({len(df):,} rows, {size_mb:.2f} MB)")
     except Exception as e:
@@ -197,7 +462,14 @@ def save_dataframe(df: pd.DataFrame, filepath: str, description: str = ""):
 
 def load_dataframe(filepath: str, description: str = "", **kwargs) -> pd.DataFrame:
     try:
-        df = pd.read_csv(filepath, **kwargs)
+        if filepath.suffix == '.parquet':
+            df = pd.read_parquet(filepath, engine='pyarrow', **kwargs)
+        elif filepath.suffix == '.feather':
+            df = pd.read_feather(filepath, **kwargs)
+        else:
+            kwargs.setdefault('encoding', config.OUTPUT_ENCODING)
+            kwargs.setdefault('sep', config.OUTPUT_SEPARATOR)
+            df = pd.read_csv(filepath, **kwargs)
         logger.info(f"✓ Loaded {description}: {filepath.name} ({len(df):,} rows)")
         return df
     except Exception as e:
@@ -205,6 +477,36 @@ def load_dataframe(filepath: str, description: str = "", **kwargs) -> pd.DataFra
         raise
 
 
+def get_part_file(filepath, part_number: int):
+    return filepath.with_name(f"{filepath.stem}.part{part_number:05d}{filepath.suffix}")
+
+
+def load_part_files(filepath, description: str = "") -> pd.DataFrame:
+    parts = sorted(filepath.parent.glob(f"{filepath.stem}.part*{filepath.suffix}"))
+    if filepath.suffix == '.parquet':
+        parts = [pq.ParquetFile(part) for part in parts]
+        names = parts[0].schema_arrow.names
+    else:
+        names = feather.read_table(parts[0], memory_map=True).column_names
+    
+    # One column at a time, so at most a single column exists both as arrow and as pandas
+    columns = {}
+    for col in names:
+        table = pa.concat_tables([read_part_column(part, col) for part in parts], promote_options='default')
+        columns[col] = table.to_pandas(self_destruct=True)[col]
+        del table
+    df = pd.DataFrame(columns, copy=False)
+    
+    logger.info(f"✓ Loaded {description}: {len(parts)} parts ({len(df):,} rows)")
+    return df
+
+
+def read_part_column(part, col: str) -> pa.Table:
+    if isinstance(part, pq.ParquetFile):
+        return part.read(columns=[col])
+    return feather.read_table(part, columns=[col], memory_map=True)
+
+
 def print_progress(current: int, total: int, message: str = "Processing"):
     percent = current / total * 100
     bar_length = 50
@@ -0,0 +1,179 @@
+import pandas as pd
+import json
+import logging
+import re
+import time
+import tracemalloc
+from utils import config
+from utils.helpers import get_peak_rss_mb, get_frame_memory_mb
+
+logging.basicConfig(level=config.LOG_LEVEL, format=config.LOG_FORMAT)
+logger = logging.getLogger(__name__)
+
+STEP_PATTERN = re.compile(r'^\n(\d+)\. (.+?)\.*$')
+
+_SPANS = []
+_OPEN_SPANS = []
+_TRACE_START = None
+
+
+class StepTraceHandler(logging.Handler):
+    def emit(self, record):
+        match = STEP_PATTERN.match(str(record.msg))
+        if match is None or not _OPEN_SPANS:
+            return
+        
+        if _OPEN_SPANS[-1]['cat'] == 'step':
+            close_span()
+        
+        stage = _OPEN_SPANS[-1]
+        start_span(f"{stage['name']}.{match.group(1)} {match.group(2)}", 'step', rows_in=stage['args'].get('rows_in'))
+
+
+_STEP_HANDLER = StepTraceHandler()
+
+
+def reset_trace():
+    global _TRACE_START
+    
+    _SPANS.clear()
+    _OPEN_SPANS.clear()
+    _TRACE_START = time.perf_counter()
+    
+    if config.TRACE_ENABLED and config.TRACE_MEMORY and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def fold_traced_peak():
+    if not tracemalloc.is_tracing():
+        return
+    
+    _, peak = tracemalloc.get_traced_memory()
+    for span in _OPEN_SPANS:
+        span['peak'] = max(span['peak'], peak)
+    tracemalloc.reset_peak()
+
+
+def start_span(name: str, cat: str = 'stage', df: pd.DataFrame = None, memory_mb: float = None, **args):
+    if not config.TRACE_ENABLED:
+        return
+    
+    if _TRACE_START is None:
+        reset_trace()
+    
+    fold_traced_peak()
+    
+    if df is not None:
+        args['rows_in'] = len(df)
+        args['df_memory_in_mb'] = round(get_frame_memory_mb(df) if memory_mb is None else memory_mb, 2)
+    
+    _OPEN_SPANS.append({
+        'name': name,
+        'cat': cat,
+        'start': time.perf_counter(),
+        'cpu_start': time.process_time(),
+        'peak': 0,
+        'args': args
+    })
+    
+    if cat == 'stage' and len(_OPEN_SPANS) == 1:
+        logging.getLogger().addHandler(_STEP_HANDLER)
+
+
+def end_span(df: pd.DataFrame = None, memory_mb: float = None, **args):
+    if not config.TRACE_ENABLED:
+        return
+    
+    while len(_OPEN_SPANS) > 1 and _OPEN_SPANS[-1]['cat'] == 'step':
+        close_span()
+    close_span(df, memory_mb, **args)
+
+
+def close_span(df: pd.DataFrame = None, memory_mb: float = None, **args):
+    if not _OPEN_SPANS:
+        return
+    
+    fold_traced_peak()
+    span = _OPEN_SPANS.pop()
+    
+    if df is not None:
+        args['rows_out'] = len(df)
+        args['df_memory_out_mb'] = round(get_frame_memory_mb(df) if memory_mb is None else memory_mb, 2)
+    
+    span['args'].update(args)
+    span['args']['peak_rss_mb'] = round(get_peak_rss_mb(), 1)
+    span['wall_s'] = time.perf_counter() - span['start']
+    span['cpu_s'] = time.process_time() - span['cpu_start']
+    _SPANS.append(span)
+    
+    if not _OPEN_SPANS:
+        logging.getLogger().removeHandler(_STEP_HANDLER)
+
+
+def close_open_spans():
+    while _OPEN_SPANS:
+        close_span()
+
+
+def build_trace_events() -> list:
+    events = []
+    for span in sorted(_SPANS, key=lambda span: span['start']):
+        args = {key: value for key, value in span['args'].items() if value is not None}
+        args['cpu_ms'] = round(span['cpu_s'] * 1000, 3)
+        if config.TRACE_MEMORY:
+            args['peak_traced_mb'] = round(span['peak'] / 1024**2, 2)
+        
+        events.append({
+            'name': span['name'],
+            'cat': span['cat'],
+            'ph': 'X',
+            'ts': round((span['start'] - _TRACE_START) * 1e6, 1),
+            'dur': round(span['wall_s'] * 1e6, 1),
+            'pid': 1,
+            'tid': 1,
+            'args': args
+        })
+    return events
+
+
+def build_trace_summary() -> pd.DataFrame:
+    rows = []
+    for span in sorted(_SPANS, key=lambda span: span['start']):
+        rows.append({
+            'span': span['name'],
+            'category': span['cat'],
+            'wall_s': round(span['wall_s'], 3),
+            'cpu_s': round(span['cpu_s'], 3),
+            'rows_in': span['args'].get('rows_in'),
+            'rows_out': span['args'].get('rows_out'),
+            'peak_traced_mb': round(span['peak'] / 1024**2, 2) if config.TRACE_MEMORY else None,
+            'peak_rss_mb': span['args'].get('peak_rss_mb'),
+            'df_memory_in_mb': span['args'].get('df_memory_in_mb'),
+            'df_memory_out_mb': span['args'].get('df_memory_out_mb')
+        })
+    return pd.DataFrame(rows).astype({'rows_in': 'Int64', 'rows_out': 'Int64'})
+
+
+def write_trace():
+    if not config.TRACE_ENABLED or not _SPANS:
+        return
+    
+    close_open_spans()
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    
+    config.FINAL_DIR.mkdir(parents=True, exist_ok=True)
+    
+    trace_file = config.FINAL_DIR / "trace.json"
+    with open(trace_file, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': build_trace_events(), 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+    
+    summary = build_trace_summary()
+    summary_file = config.FINAL_DIR / "trace_summary.csv"
+    summary.to_csv(summary_file, index=False, encoding=config.OUTPUT_ENCODING)
+    
+    logger.info(f"✓ Saved trace: {trace_file.name} ({len(summary)} spans) and {summary_file.name}")
+    
+    stages = summary[summary['category'] == 'stage']
+    for _, row in stages.iterrows():
+        logger.info(f"   {row['span']:<28} {row['wall_s']:>9.2f}s wall {row['cpu_s']:>9.2f}s cpu")